@@ -13,6 +13,12 @@ class development:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     PROPAGATE_EXCEPTIONS = True
     UPLOAD_FOLDER = "App/uploads"
+    IMAGE_STORAGE = "firebase"
+    IMAGE_STORAGE_URL = "/api/images"
+    OSRM_URL = "http://osrm.justinbaldeo.com/nearest/v1/driving/"
+    OSRM_TIMEOUT = 2
+    ROAD_SEGMENTS_FILE = None
+    POTHOLE_SNAPSHOT_FILE = None
     MAX_CONTENT_LENGTH = 15 * 1000 * 1000
     JWT_SECRET_KEY = ""
     GOOGLE_CLIENT_ID = ""
@@ -34,6 +40,12 @@ class production:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     PROPAGATE_EXCEPTIONS = True
     UPLOAD_FOLDER = "App/uploads"
+    IMAGE_STORAGE = "firebase"
+    IMAGE_STORAGE_URL = "/api/images"
+    OSRM_URL = "http://osrm.justinbaldeo.com/nearest/v1/driving/"
+    OSRM_TIMEOUT = 2
+    ROAD_SEGMENTS_FILE = None
+    POTHOLE_SNAPSHOT_FILE = None
     MAX_CONTENT_LENGTH = 15 * 1000 * 1000
     JWT_SECRET_KEY = ""
     GOOGLE_CLIENT_ID = ""
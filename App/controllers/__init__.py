@@ -1,6 +1,17 @@
 #Imports the individual controllers for the application.
+from .responseEncoding import *
+from .responseCache import *
+from .dataVersion import *
+from .potholeSnapshot import *
+from .potholeCache import *
+from .imageStorage import *
+from .snapCache import *
+from .osrm import *
+from .roadNetwork import *
 from .user import *
 from .pothole import *
+from .potholeChange import *
+from .potholeCluster import *
 from .report import *
 from .reportedImage import *
 from .userReportVote import *
\ No newline at end of file
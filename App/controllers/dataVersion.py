@@ -0,0 +1,114 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#DATAVERSION CONTROLLERS - Facilitate interactions between the dataVersion model and the other models/controllers of the application.
+
+#CONSTANTS
+#Specifies the name of the data version that is bumped whenever the potholes, reports, images or votes served by the listing endpoints are changed.
+DATA_VERSION = "data"
+#Specifies the attributes of the users that are included in the listings of the reports; changes to the other attributes of users are not served.
+USER_LISTING_ATTRIBUTES = ("firstName", "lastName")
+
+#Imports flask and sqlalchemy modules.
+from flask import Response, request
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+#Imports the all of the required models and controllers.
+from App.models import *
+from App.controllers.responseEncoding import prefersMsgpack
+from App.controllers.responseCache import acceptsGzip, compressResponseData, getResponseCache
+
+#Returns the current version of the dataset with the given name. Datasets that have never been modified are at version 0.
+def getDataVersion(name):
+    version = db.session.query(DataVersion.version).filter_by(name=name).scalar()
+    return version if version != None else 0
+
+#Increments the version of the dataset with the given name and returns the new version.
+#The increment is not committed here, such that it is committed in the same transaction as the change to the dataset.
+def bumpDataVersion(name):
+    #Atomically increments the version in the database, so that concurrent workers never observe the same version for different data.
+    bumpDataVersionOnConnection(db.session.connection(), name)
+
+    #Returns the version as seen by the current transaction.
+    return getDataVersion(name)
+
+#Sets the version of the dataset with the given name to the given version, or increments it by the given version, using the given connection. The version
+#record is created and updated by a single upsert, such that workers that change a dataset for the first time at the same time do not both attempt to
+#create its record.
+def upsertDataVersion(connection, name, version, increment=False):
+    table = DataVersion.__table__
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    upsert = dialect.insert(table).values(name=name, version=version)
+    connection.execute(upsert.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"version" : table.c.version + upsert.excluded.version if increment else upsert.excluded.version}
+    ))
+
+#Sets the version of the dataset with the given name, in the current transaction, creating its version record if there is none.
+def setDataVersion(name, version):
+    upsertDataVersion(db.session.connection(), name, version)
+
+#Increments the version of the dataset with the given name, using the connection of the current transaction directly, such that it can be used during a flush.
+#The version is incremented by one unless another increment is given, such as when the record is used as a counter. If there is no version record for the
+#dataset, one is created at the increment.
+def bumpDataVersionOnConnection(connection, name, increment=1):
+    upsertDataVersion(connection, name, increment, increment=True)
+
+#Determines whether an object written by a flush changes the data served by the listing endpoints.
+def isListedChange(session, instance):
+    if isinstance(instance, (Pothole, Report, ReportedImage, UserReportVote)):
+        return True
+    #Users are only listed by their names, as the reporters of reports.
+    if isinstance(instance, User) and instance not in session.new and instance not in session.deleted:
+        return any(inspect(instance).attrs[attribute].history.has_changes() for attribute in USER_LISTING_ATTRIBUTES)
+    return False
+
+#Bumps the data version in the same transaction as any flush that writes listed data.
+@event.listens_for(Session, "after_flush")
+def bumpDataVersionAfterFlush(session, flushContext):
+    if any(isListedChange(session, instance) for instance in list(session.new) + list(session.dirty) + list(session.deleted)):
+        bumpDataVersionOnConnection(session.connection(), DATA_VERSION)
+
+#Bumps the data version in the same transaction as any bulk update or delete of listed data, such as the updates of the vote counts, which bypass the flush.
+@event.listens_for(Session, "do_orm_execute")
+def bumpDataVersionOnBulkExecute(ormExecuteState):
+    if (ormExecuteState.is_update or ormExecuteState.is_delete) and ormExecuteState.bind_mapper and ormExecuteState.bind_mapper.class_ in (Pothole, Report, ReportedImage, UserReportVote):
+        bumpDataVersionOnConnection(ormExecuteState.session.connection(), DATA_VERSION)
+
+#Returns the response of a listing endpoint, using the data version as a strong ETag. If the request already holds the current version, a 'NOT MODIFIED'
+#http status code (304) is returned without loading the listing. Otherwise the listing is loaded using the getData controller and the given arguments.
+#Listings requested with gzip compression are compressed once for each version, and served from the response cache of the worker until the version changes.
+def conditionalDataResponse(getData, *args):
+    #The version is read before the listing, such that a change committed in between results in a newer listing under an older ETag, and never the reverse.
+    #Each encoding and compression of the listing is tagged separately, and caches are told that the listing varies with the 'Accept' and 'Accept-Encoding'
+    #headers of the request.
+    version = getDataVersion(DATA_VERSION)
+    compressed = acceptsGzip()
+    etag = str(version) + ("-msgpack" if prefersMsgpack() else "") + ("-gzip" if compressed else "")
+    headers = {"ETag" : '"' + etag + '"', "Cache-Control" : "no-cache", "Vary" : "Accept, Accept-Encoding"}
+    if request.if_none_match.contains_weak(etag):
+        return "", 304, headers
+
+    #Returns the compressed listing of the current version if it is cached, along with the headers of the listing.
+    if compressed:
+        cached = getResponseCache().get(version, (request.full_path, etag))
+        if cached:
+            (body, mimetype, listingHeaders) = cached
+            return Response(body, mimetype=mimetype), 200, dict(headers, **listingHeaders, **{"Content-Encoding" : "gzip"})
+
+    #The getData controller may also return headers for the listing, such as the cursor of the next page.
+    (displayData, statusCode, *listingHeaders) = getData(*args)
+    #Only successful listings are tagged with the version.
+    if statusCode != 200:
+        return displayData, statusCode
+    listingHeaders = listingHeaders[0] if listingHeaders else {}
+
+    #Compresses the listing and caches it for the version, before returning it.
+    if compressed:
+        (body, mimetype) = compressResponseData(displayData)
+        getResponseCache().put(version, (request.full_path, etag), (body, mimetype, listingHeaders))
+        return Response(body, mimetype=mimetype), 200, dict(headers, **listingHeaders, **{"Content-Encoding" : "gzip"})
+    return displayData, statusCode, dict(headers, **listingHeaders)
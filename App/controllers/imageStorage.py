@@ -0,0 +1,102 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#IMAGESTORAGE CONTROLLERS - Store the images of reports in either the firebase cloud storage or the local filesystem, as selected by the configuration.
+
+#CONSTANTS
+#Specifies the image storage that is used when the application does not configure one; either 'firebase' or 'local'.
+DEFAULT_IMAGE_STORAGE = "firebase"
+#Specifies the folder in which the local image storage stores the images, when the application does not configure one.
+DEFAULT_UPLOAD_FOLDER = "App/uploads"
+#Specifies the route from which the images of the local image storage are served.
+LOCAL_IMAGE_ROUTE = "/api/images"
+#Specifies the number of seconds for which clients may cache the images served from the local image storage (one year).
+LOCAL_IMAGE_CACHE_TIMEOUT = 31536000
+#Specifies the content types of images.
+IMAGE_CONTENT_TYPES = ("image/png", "image/jpeg", "image/jpg")
+
+#Imports os, hashing, random and file modules.
+import os, time, random, string, hashlib, tempfile
+from io import BytesIO
+from flask import current_app
+from werkzeug.utils import safe_join
+
+#Imports the firebase modules and configuration.
+from pyrebase import pyrebase
+from App.firebaseConfig import config
+
+#Stores the images in the firebase cloud storage bucket.
+class FirebaseImageStorage:
+    #Initializes the firebase object and the storage object.
+    def __init__(self):
+        self.storage = pyrebase.initialize_app(config).storage()
+
+    #Stores a JPEG image at the directory in the bucket, under a randomized filename, and returns the link to the stored image.
+    def upload(self, imageData, directory):
+        #Generates randomized filename for firebase
+        milliseconds = int(time.time() * 1000)
+        randomString = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
+        fileName = "REPORT " + str(milliseconds) + "_" + randomString + ".jpg"
+
+        #Stores the image in the bucket directly from memory. The upload responds with the metadata of the stored object, which confirms
+        #that it was stored as an image, without downloading it again. Uploads made with service account credentials raise an error on failure instead.
+        metadata = self.storage.child(directory + fileName).put(BytesIO(imageData))
+        if isinstance(metadata, dict) and metadata.get("contentType") not in IMAGE_CONTENT_TYPES:
+            raise Exception("Firebase did not store the upload as an image.")
+
+        #Obtains a link for the newly stored image.
+        return self.storage.child(directory + fileName).get_url(None)
+
+    #Deletes the image with the given link from the bucket.
+    def delete(self, imageURL):
+        #Obtains the path of the image on the firebase storage.
+        filePath = imageURL.split("/")[-1].split("?")[0]
+        filePath = filePath.replace("%2F", "/").replace("%20", " ")
+        self.storage.delete(filePath, None)
+
+#Stores the images in a folder of the local filesystem, under names derived from their content, such that an image is never modified once stored.
+class LocalImageStorage:
+    #Initializes the storage with the folder in which the images are stored, and the URL from which the folder is served.
+    def __init__(self, folder, baseURL):
+        self.folder = os.path.abspath(folder)
+        self.baseURL = baseURL.rstrip("/")
+
+    #Returns the location of a stored image within the folder, or None if the path is outside of the folder.
+    def getPath(self, filePath):
+        return safe_join(self.folder, filePath)
+
+    #Stores a JPEG image at the directory in the folder, under the hash of its content, and returns the link to the stored image.
+    #The image is stored once it has been written, such that the upload does not need to be verified.
+    def upload(self, imageData, directory):
+        #Names the image by the hash of its content, and spreads the images across subdirectories by the start of the hash.
+        digest = hashlib.sha256(imageData).hexdigest()
+        filePath = directory + digest[:2] + "/" + digest + ".jpg"
+        location = self.getPath(filePath)
+
+        #Identical images are stored once. Otherwise, the image is written to a temporary file that is renamed into place,
+        #such that a partially written image is never served.
+        if not os.path.exists(location):
+            os.makedirs(os.path.dirname(location), exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(location), delete=False) as temp:
+                temp.write(imageData)
+            os.replace(temp.name, location)
+        return self.baseURL + "/" + filePath
+
+    #Deletes the image with the given link from the folder.
+    def delete(self, imageURL):
+        #Obtains the path of the image within the folder, from the directory, subdirectory and name at the end of the link.
+        filePath = "/".join(imageURL.split("?")[0].split("/")[-3:])
+        os.remove(self.getPath(filePath))
+
+#Creates the image storage selected by the configuration of the application.
+def createImageStorage(appConfig):
+    if appConfig.get("IMAGE_STORAGE", DEFAULT_IMAGE_STORAGE) == "local":
+        return LocalImageStorage(appConfig.get("UPLOAD_FOLDER") or DEFAULT_UPLOAD_FOLDER, appConfig.get("IMAGE_STORAGE_URL") or LOCAL_IMAGE_ROUTE)
+    return FirebaseImageStorage()
+
+#Returns the image storage of the current application, creating it upon first use.
+def getImageStorage():
+    if "imageStorage" not in current_app.extensions:
+        current_app.extensions["imageStorage"] = createImageStorage(current_app.config)
+    return current_app.extensions["imageStorage"]
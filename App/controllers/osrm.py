@@ -0,0 +1,143 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#OSRM CONTROLLERS - Request the nearest roads from the OSRM server, within a deadline, and stop contacting the server while it is failing.
+
+#CONSTANTS
+#Specifies the address of the nearest service of the OSRM server, when the application does not configure one.
+DEFAULT_OSRM_URL = "http://osrm.justinbaldeo.com/nearest/v1/driving/"
+#Specifies the number of seconds that a request to the OSRM server may take to connect, or to respond, when the application does not configure one.
+DEFAULT_OSRM_TIMEOUT = 2
+#Specifies the number of consecutive failed requests after which the OSRM server is no longer contacted.
+OSRM_FAILURE_THRESHOLD = 3
+#Specifies the number of seconds between the background requests that check whether the OSRM server has recovered.
+OSRM_PROBE_INTERVAL = 30
+#Specifies the coordinates, within Trinidad, that are snapped when checking whether the OSRM server has recovered.
+OSRM_PROBE_COORDINATES = (10.6416, -61.3995)
+#Specifies the maximum number of requests that a worker sends to the OSRM server at the same time, when snapping a batch of coordinates.
+OSRM_BATCH_CONCURRENCY = 8
+
+#Imports atexit, requests, threading, time and flask modules.
+import atexit, requests, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+#Signals that the OSRM server was not contacted, as it has failed repeatedly and has not yet recovered.
+class OSRMUnavailable(Exception):
+    pass
+
+#Requests the nearest roads from the OSRM server, acting as a circuit breaker; after repeated failures the circuit is opened, and requests fail
+#immediately until a background probe finds that the server has recovered. Each worker keeps its own circuit.
+class OSRMClient:
+    #Initializes a closed circuit for the OSRM server at the given address.
+    def __init__(self, url, timeout, failureThreshold=OSRM_FAILURE_THRESHOLD, probeInterval=OSRM_PROBE_INTERVAL, concurrency=OSRM_BATCH_CONCURRENCY):
+        self.url = url if url.endswith("/") else url + "/"
+        self.timeout = timeout
+        self.failureThreshold = failureThreshold
+        self.probeInterval = probeInterval
+        self.concurrency = concurrency
+        self.failures = 0
+        self.open = False
+        self.lock = threading.Lock()
+        self.sessions = threading.local()
+        self.executor = None
+
+    #Returns the session of the current thread, which keeps its connection to the OSRM server open between requests.
+    def getSession(self):
+        if not hasattr(self.sessions, "session"):
+            self.sessions.session = requests.Session()
+        return self.sessions.session
+
+    #Requests the nearest road to the coordinates from the OSRM server, and returns the snapped (latitude, longitude).
+    def requestNearest(self, latitude, longitude):
+        #Sends a request to the OSRM server, abandoning it if the server does not connect or respond within the timeout.
+        r = self.getSession().get(self.url + str(longitude) + ',' + str(latitude), timeout=self.timeout)
+        #If the status code of the request is 200, convert the response to json and return the location coordinates.
+        if r.status_code == 200:
+            jsonReq = r.json()
+            return jsonReq["waypoints"][0]["location"][1], jsonReq["waypoints"][0]["location"][0]
+        #Otherwise raise an exception.
+        raise Exception("OSRM server did not return a valid response.")
+
+    #Snaps the coordinates to the nearest road, and records the outcome in the circuit. Raises OSRMUnavailable without contacting the server if the
+    #circuit is open, or any error of the request if it fails.
+    def nearest(self, latitude, longitude):
+        if self.open:
+            raise OSRMUnavailable("OSRM server is unavailable.")
+
+        #Attempts to snap the coordinates, counting the failure if the server cannot be reached, times out, or responds with an error.
+        try:
+            snappedCoords = self.requestNearest(latitude, longitude)
+        except:
+            self.recordFailure()
+            raise
+        self.recordSuccess()
+        return snappedCoords
+
+    #Snaps each of the given (latitude, longitude) coordinates to the nearest road, and returns the snapped coordinates in the same order, or None for each
+    #of the coordinates that could not be snapped. The nearest service snaps a single coordinate per request, so the requests are sent concurrently,
+    #at most 'concurrency' at a time, each reusing the connection of its thread.
+    def nearestMany(self, coordinates):
+        if not coordinates:
+            return []
+        return list(self.getExecutor().map(self.tryNearest, coordinates))
+
+    #Returns the executor that sends the concurrent requests of the client, creating it upon first use. The executor is kept for the lifetime of the client,
+    #such that its threads, and therefore the connections of their sessions, are reused by every batch.
+    def getExecutor(self):
+        with self.lock:
+            if self.executor == None:
+                self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="osrm")
+            return self.executor
+
+    #Shuts down the executor of the client, once the requests that it is sending have completed. A later batch creates a new executor.
+    def close(self):
+        with self.lock:
+            (executor, self.executor) = (self.executor, None)
+        if executor:
+            executor.shutdown()
+
+    #Snaps the (latitude, longitude) coordinates to the nearest road, returning None if they could not be snapped.
+    def tryNearest(self, coordinates):
+        try:
+            return self.nearest(*coordinates)
+        except:
+            return None
+
+    #Resets the count of consecutive failures.
+    def recordSuccess(self):
+        with self.lock:
+            self.failures = 0
+
+    #Counts a consecutive failure, and opens the circuit once the threshold is reached; starting the background probe.
+    def recordFailure(self):
+        with self.lock:
+            self.failures += 1
+            if self.open or self.failures < self.failureThreshold:
+                return
+            self.open = True
+        threading.Thread(target=self.probe, daemon=True).start()
+
+    #Periodically snaps the probe coordinates while the circuit is open, and closes the circuit once the OSRM server responds.
+    def probe(self):
+        while self.open:
+            time.sleep(self.probeInterval)
+            try:
+                self.requestNearest(*OSRM_PROBE_COORDINATES)
+            except:
+                continue
+            with self.lock:
+                self.failures = 0
+                self.open = False
+
+#Creates the OSRM client configured by the application.
+def createOSRMClient(appConfig):
+    return OSRMClient(appConfig.get("OSRM_URL") or DEFAULT_OSRM_URL, float(appConfig.get("OSRM_TIMEOUT") or DEFAULT_OSRM_TIMEOUT))
+
+#Returns the OSRM client of the current application, creating it upon first use. The client is closed when the worker exits.
+def getOSRMClient():
+    if "osrmClient" not in current_app.extensions:
+        current_app.extensions["osrmClient"] = createOSRMClient(current_app.config)
+        atexit.register(current_app.extensions["osrmClient"].close)
+    return current_app.extensions["osrmClient"]
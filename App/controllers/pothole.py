@@ -4,46 +4,107 @@
 
 #POTHOLE CONTROLLERS - Facilitate interactions between the pothole model and the other models/controllers of the application.
 
-#Imports json.
+#CONSTANTS
+#Specifies the number of potholes that are snapped in each transaction when re-snapping all of the potholes.
+RESNAP_BATCH_SIZE = 1000
+#Specifies the number of potholes returned for a viewport when no limit is given, and the largest limit that can be given.
+VIEWPORT_DEFAULT_LIMIT = 500
+VIEWPORT_MAX_LIMIT = 2000
+#Specifies the number of rows that are read from the database at a time when streaming a listing.
+STREAM_BATCH_SIZE = 1000
+
+#Imports array, json, flask and sqlalchemy functions.
 import json
+from array import array
+from flask import Response, has_request_context
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
 
 #Imports the all of the required models and controllers.
 from App.models import *
 from App.controllers import *
 from App.controllers.reportedImage import deleteAllPotholeImagesFromStorage, deleteImageFromStorage
+from App.controllers.potholeCache import POTHOLE_CACHE_VERSION, bumpPotholeCacheVersion, cachePotholeDeleted
+from App.controllers.responseEncoding import encodeListing, encodeListingStream, prefersMsgpack
+from App.controllers.dataVersion import getDataVersion
+from App.controllers.potholeSnapshot import POTHOLE_LISTING_VERSION, getPotholeSnapshot, getPotholeSnapshotFile, lockPotholeSnapshot, writePotholeSnapshot
+
+#Returns a query for the (potholeID, longitude, latitude, numReports, expiryDate) of potholes, where the number of reports for each pothole
+#is counted by the database. The rows are returned as plain tuples, rather than loading the pothole and report objects.
+def queryPotholeSummaries():
+    return db.session.query(Pothole.potholeID, Pothole.longitude, Pothole.latitude, func.count(Report.reportID), Pothole.expiryDate) \
+        .outerjoin(Report, Report.potholeID == Pothole.potholeID) \
+        .group_by(Pothole.potholeID, Pothole.longitude, Pothole.latitude, Pothole.expiryDate)
+
+#Returns the dictionary definition of a pothole summary row, matching the dictionary definition of the pothole model.
+def potholeSummaryToDict(potholeRow):
+    (potholeID, longitude, latitude, numReports, expiryDate) = potholeRow
+    return {
+        "potholeID" : potholeID,
+        "longitude" : longitude,
+        "latitude" : latitude,
+        "numReports" : numReports,
+        "expiryDate" : expiryDate.strftime("%Y-%m-%d")
+    }
 
 #Retrieves all of the potholes that are in the database and returns their dictionary definitions in an array, in json form, as well as
 #an 'OK' http status code (200).
 def getPotholeData():
     #Attempts to get and return all of the potholes in the database.
     try:
-        #Retrieves all of the potholes from the database.
-        potholes = db.session.query(Pothole).all()
-        #Gets the dictionary definition of each of the potholes and stores them in an array.
-        potholeData = [p.toDict() for p in potholes]
-        #Returns the json form of the array, as well as an OK http status (200) code.
-        return json.dumps(potholeData), 200
+        #If a snapshot file is configured, the json listing is served from the snapshot shared by the workers, publishing it if it is out of date.
+        if getPotholeSnapshotFile() and has_request_context() and not prefersMsgpack():
+            snapshot = getPotholeSnapshot()
+            if not snapshot or snapshot.listingVersion != getDataVersion(POTHOLE_LISTING_VERSION):
+                snapshot = publishPotholeSnapshot()
+            #The listing is sent from the mapped snapshot, without being copied. If another worker is publishing the snapshot, the listing is read
+            #from the database instead.
+            if snapshot:
+                return Response([snapshot.listing], mimetype="application/json"), 200
+
+        #Executes the query for the summaries of all of the potholes, which are then read from the database in batches as the listing is streamed.
+        potholes = iter(queryPotholeSummaries().order_by(Pothole.potholeID).yield_per(STREAM_BATCH_SIZE))
+        #Returns the streamed json form of the potholes, as well as an OK http status (200) code.
+        return encodeListingStream(potholes, potholeSummaryToDict), 200
     except:
     #If an error was encountered in getting the pothole data, rollback the query (querying invalid datatype crashes POSTGRES database ONLY)
         db.session.rollback()
         return json.dumps({"error": "Invalid pothole details specified."}), 400
 
 
+#Publishes a snapshot of the json listing of all of the potholes, and their coordinates, to the configured snapshot file, and returns the snapshot.
+#Returns None without publishing if another worker is publishing the snapshot.
+def publishPotholeSnapshot():
+    snapshotFile = getPotholeSnapshotFile()
+    with lockPotholeSnapshot(snapshotFile) as locked:
+        if not locked:
+            return None
+        #The versions are read before the potholes, such that a change committed in between results in a newer snapshot under an older version.
+        (listingVersion, potholeVersion) = (getDataVersion(POTHOLE_LISTING_VERSION), getDataVersion(POTHOLE_CACHE_VERSION))
+        potholes = queryPotholeSummaries().order_by(Pothole.potholeID).all()
+        coordinates = array("d")
+        for (potholeID, longitude, latitude, numReports, expiryDate) in potholes:
+            coordinates.extend((potholeID, latitude, longitude))
+        listing = json.dumps([potholeSummaryToDict(p) for p in potholes]).encode()
+        writePotholeSnapshot(snapshotFile, listingVersion, potholeVersion, listing, coordinates)
+    return getPotholeSnapshot()
+
 #Retrieves all of the user's potholes that are in the database and returns their dictionary definitions in an array, in json form, as well as
 #an 'OK' http status code (200).
 def getUserPotholeData(user):
     #Attempts to get and return all of the user's potholes in the database.
     try:
-        #Retrieves all of the potholes from the database.
-        potholes = db.session.query(Pothole).filter_by().all()
-
-        #Creates an empty array and iterates over all of the pothole and stores their toDict in the array.
-        potholeData = []
-        for pothole in potholes:
-            potholeData += [pothole.toDict() for report in pothole.reports if user.userID == report.userID]
+        #Retrieves the summaries of the potholes for which the user has a report, using a single query. The potholes are selected from the
+        #reports of the user, through the index on their userID, and each pothole is returned once regardless of how many reports the user made.
+        #The reports of the user are aliased, so that they are not correlated with the reports that are counted by the summaries.
+        userReport = aliased(Report)
+        userPotholeIDs = db.session.query(userReport.potholeID).filter(userReport.userID == user.userID)
+        potholes = queryPotholeSummaries().filter(Pothole.potholeID.in_(userPotholeIDs)).order_by(Pothole.potholeID).all()
+        #Gets the dictionary definition of each of the user's potholes and stores them in an array.
+        potholeData = [potholeSummaryToDict(p) for p in potholes]
 
         #Returns the dump of the pothole data, and OK status code.
-        return json.dumps(potholeData), 200
+        return encodeListing(potholeData), 200
     except:
     #If an error was encountered in getting the pothole data, rollback the query (querying invalid datatype crashes POSTGRES database ONLY)
         db.session.rollback()
@@ -67,6 +128,37 @@ def getIndividualPotholeData(potholeID):
         db.session.rollback()
         return json.dumps({"error": "Invalid pothole ID specified."}), 400
 
+#Retrieves the potholes within the viewport given by the bounding box, in the form 'minLongitude,minLatitude,maxLongitude,maxLatitude', and returns at most
+#'limit' of their dictionary definitions in an array, in json form, ordered by potholeID. If there are more potholes in the viewport, the potholeID of the
+#last returned pothole is also returned in the 'X-Next-Cursor' header, and is given as the cursor to continue from that pothole.
+def getPotholesInViewport(bbox, limit=None, cursor=None):
+    #Attempts to get and return the potholes in the viewport.
+    try:
+        (minLongitude, minLatitude, maxLongitude, maxLatitude) = [float(value) for value in bbox.split(",")]
+        limit = int(limit) if limit else VIEWPORT_DEFAULT_LIMIT
+        cursor = int(cursor) if cursor else 0
+        #If the bounding box or the limit is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if minLongitude > maxLongitude or minLatitude > maxLatitude or not 0 < limit <= VIEWPORT_MAX_LIMIT:
+            return json.dumps({"error": "Invalid viewport specified. The limit must be between 1 and " + str(VIEWPORT_MAX_LIMIT) + "."}), 400
+
+        #Retrieves the summaries of the potholes in the viewport after the cursor, using the range predicates on the indexed coordinates.
+        #An additional pothole is retrieved to determine if the viewport has more potholes than the limit.
+        potholes = queryPotholeSummaries().filter(
+            Pothole.latitude.between(minLatitude, maxLatitude),
+            Pothole.longitude.between(minLongitude, maxLongitude),
+            Pothole.potholeID > cursor
+        ).order_by(Pothole.potholeID).limit(limit + 1).all()
+        potholeData = [potholeSummaryToDict(p) for p in potholes[:limit]]
+
+        #Returns the json form of the potholes, and the cursor of the next page if there is one, as well as an OK http status (200) code.
+        if len(potholes) > limit:
+            return encodeListing(potholeData), 200, {"X-Next-Cursor" : str(potholeData[-1]["potholeID"])}
+        return encodeListing(potholeData), 200
+    except:
+    #If the viewport is invalid, rollback the query and return an error and 'BAD REQUEST' http status code (400).
+        db.session.rollback()
+        return json.dumps({"error": "Invalid viewport specified."}), 400
+
 #Deletes a pothole given a particular potholeID.
 def deletePothole(potholeID):
     try:
@@ -79,9 +171,13 @@ def deletePothole(potholeID):
         else:
             #If a pothle is found, delete all the images associated with the pothole, and delete the pothole.
             try:
-                deleteAllPotholeImagesFromStorage(pothole.potholeID)
+                deletedPotholeID = pothole.potholeID
+                deleteAllPotholeImagesFromStorage(deletedPotholeID)
                 db.session.delete(pothole)
+                potholeVersion = bumpPotholeCacheVersion()
                 db.session.commit()
+                #Removes the deleted pothole from the pothole cache once the deletion has been committed.
+                cachePotholeDeleted(deletedPotholeID, potholeVersion)
                 return True
             except:
             #If the deletion operation fails, rollback the database and return False that the pothole could not be deleted.
@@ -108,6 +204,32 @@ def deleteExpiredPotholes():
         print("error deleting expired potholes")
         db.session.rollback()
 
+#Snaps the coordinates of all of the potholes to the nearest roads using the snapper, either the OSRM client or a road network, and returns the number of
+#potholes that were moved. The potholes are snapped in batches, each loaded, snapped and committed separately, and potholes that cannot be snapped keep their coordinates.
+def resnapAllPotholes(snapper):
+    moved = 0
+    lastPotholeID = 0
+    while True:
+        #Selects the next batch of potholes, by potholeID.
+        potholes = db.session.query(Pothole).filter(Pothole.potholeID > lastPotholeID).order_by(Pothole.potholeID).limit(RESNAP_BATCH_SIZE).all()
+        if not potholes:
+            return moved
+        lastPotholeID = potholes[-1].potholeID
+
+        #Snaps the batch of potholes at once, and moves each of the potholes that is not already on its nearest road.
+        batchMoved = 0
+        snappedCoords = snapper.nearestMany([(pothole.latitude, pothole.longitude) for pothole in potholes])
+        for (pothole, coords) in zip(potholes, snappedCoords):
+            if coords and coords != (pothole.latitude, pothole.longitude):
+                (pothole.latitude, pothole.longitude) = coords
+                batchMoved += 1
+
+        #Records the change to the potholes, such that the pothole caches of the workers are reloaded.
+        if batchMoved:
+            bumpPotholeCacheVersion()
+        db.session.commit()
+        moved += batchMoved
+
 
 ##################### TEST CONTROLLERS #####################
 #Gets all of the potholes within the database and returns it in an array.
@@ -130,9 +252,12 @@ def nukePotholesInDB():
         allPotholes = db.session.query(Pothole).all()
         #Individual deletes each of all of the potholes and commits the transaction.
         for pothole in allPotholes:
-            deleteAllPotholeImagesFromStorage(pothole.potholeID)
+            potholeID = pothole.potholeID
+            deleteAllPotholeImagesFromStorage(potholeID)
             db.session.delete(pothole)
+            potholeVersion = bumpPotholeCacheVersion()
             db.session.commit()
+            cachePotholeDeleted(potholeID, potholeVersion)
             
     except:
     #If an error is encountered, rollback the last delete and return an error.
@@ -0,0 +1,130 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#POTHOLECACHE CONTROLLERS - Maintain a process-local spatial cache of the pothole coordinates, used to match reports to potholes without scanning the database.
+
+#CONSTANTS
+#Specifies the name of the data version that is bumped whenever a pothole is created or deleted.
+POTHOLE_CACHE_VERSION = "potholes"
+#Specifies the size, in degrees, of each cell in the uniform grid of the cache (approximately 110 meters).
+GRID_CELL_SIZE = 0.001
+
+#Imports math and flask modules.
+import math
+from flask import current_app
+
+#Imports the all of the required models and controllers.
+from App.models import *
+from App.controllers.dataVersion import getDataVersion, bumpDataVersion
+from App.controllers.potholeSnapshot import getPotholeSnapshot
+
+#Defines a uniform grid of pothole coordinates, where each cell holds the potholeIDs of the potholes located within it.
+class PotholeCache:
+    #Initializes an empty cache that has not been loaded for any version of the pothole data.
+    def __init__(self):
+        self.version = None
+        self.cells = {}
+        self.coordinates = {}
+
+    #Returns the grid cell that contains the given coordinates.
+    def getCell(self, latitude, longitude):
+        return (math.floor(latitude / GRID_CELL_SIZE), math.floor(longitude / GRID_CELL_SIZE))
+
+    #Replaces the contents of the cache with the given (potholeID, latitude, longitude) rows, at the given version.
+    def load(self, potholeRows, version):
+        self.cells = {}
+        self.coordinates = {}
+        for (potholeID, latitude, longitude) in potholeRows:
+            self.add(potholeID, latitude, longitude)
+        self.version = version
+
+    #Adds a pothole to the cell of the grid containing its coordinates.
+    def add(self, potholeID, latitude, longitude):
+        self.coordinates[potholeID] = (latitude, longitude)
+        self.cells.setdefault(self.getCell(latitude, longitude), []).append(potholeID)
+
+    #Removes a pothole from the cache, if it is present.
+    def remove(self, potholeID):
+        coordinates = self.coordinates.pop(potholeID, None)
+        if coordinates:
+            cell = self.getCell(*coordinates)
+            self.cells[cell].remove(potholeID)
+            if not self.cells[cell]:
+                del self.cells[cell]
+
+    #Returns the (potholeID, latitude, longitude) of all of the cached potholes within the given bounding box.
+    def findInBoundingBox(self, minLatitude, maxLatitude, minLongitude, maxLongitude):
+        (minRow, minColumn) = self.getCell(minLatitude, minLongitude)
+        (maxRow, maxColumn) = self.getCell(maxLatitude, maxLongitude)
+
+        #Iterates over only the cells overlapping the bounding box and keeps the potholes that are inside of it.
+        candidates = []
+        for row in range(minRow, maxRow + 1):
+            for column in range(minColumn, maxColumn + 1):
+                for potholeID in self.cells.get((row, column), []):
+                    (latitude, longitude) = self.coordinates[potholeID]
+                    if minLatitude <= latitude <= maxLatitude and minLongitude <= longitude <= maxLongitude:
+                        candidates.append((potholeID, latitude, longitude))
+        return candidates
+
+#Returns the pothole cache of the current application, creating an empty cache if it does not exist.
+def getPotholeCache():
+    if "potholeCache" not in current_app.extensions:
+        current_app.extensions["potholeCache"] = PotholeCache()
+    return current_app.extensions["potholeCache"]
+
+#Loads all of the pothole coordinates from the database into the pothole cache.
+def refreshPotholeCache():
+    #The version is read before the potholes, so that a change committed in between results in a reload at the next synchronization.
+    version = getDataVersion(POTHOLE_CACHE_VERSION)
+    #The coordinates are read from the snapshot shared by the workers if it was published at the same version, rather than from the database.
+    snapshot = getPotholeSnapshot()
+    if snapshot and snapshot.potholeVersion == version:
+        potholeRows = snapshot.getPotholeRows()
+    else:
+        potholeRows = db.session.query(Pothole.potholeID, Pothole.latitude, Pothole.longitude).all()
+    getPotholeCache().load(potholeRows, version)
+
+#Ensures that the pothole cache reflects the latest version of the potholes, which may have been changed by another worker.
+def syncPotholeCache():
+    if getPotholeCache().version != getDataVersion(POTHOLE_CACHE_VERSION):
+        refreshPotholeCache()
+
+#Loads the pothole cache when the application is created.
+def warmPotholeCache():
+    #Attempts to load the pothole cache.
+    try:
+        refreshPotholeCache()
+    except:
+    #If the database has not been initialized, rollback the query; the cache would be loaded upon the first synchronization.
+        db.session.rollback()
+
+#Records a change to the potholes in the current transaction, and returns the new version of the pothole data.
+def bumpPotholeCacheVersion():
+    return bumpDataVersion(POTHOLE_CACHE_VERSION)
+
+#Updates the pothole cache once a transaction, that created a pothole at the given version, has been committed.
+def cachePotholeCreated(potholeID, latitude, longitude, version):
+    cachePotholesCreated([(potholeID, latitude, longitude)], version)
+
+#Updates the pothole cache once a transaction, that created the (potholeID, latitude, longitude) potholes at the given version, has been committed.
+def cachePotholesCreated(potholeRows, version):
+    cache = getPotholeCache()
+    #If the cache is at the previous version, the potholes can be added directly. Otherwise, another worker has also changed the potholes.
+    if cache.version == version - 1:
+        for (potholeID, latitude, longitude) in potholeRows:
+            cache.add(potholeID, latitude, longitude)
+        cache.version = version
+    else:
+        cache.version = None
+
+#Updates the pothole cache once a transaction, that deleted a pothole at the given version, has been committed.
+def cachePotholeDeleted(potholeID, version):
+    cache = getPotholeCache()
+    #If the cache is at the previous version, the pothole can be removed directly. Otherwise, another worker has also changed the potholes.
+    if cache.version == version - 1:
+        cache.remove(potholeID)
+        cache.version = version
+    else:
+        cache.version = None
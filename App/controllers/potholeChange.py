@@ -0,0 +1,92 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#POTHOLECHANGE CONTROLLERS - Log the changes to the potholes, such that clients can synchronize the potholes that changed since they last synchronized.
+
+#CONSTANTS
+#Specifies the number of days for which changes are kept in the log, after which clients that have not synchronized must reload all of the potholes.
+POTHOLE_CHANGE_RETENTION = 30
+#Specifies the name of the data version that holds the last changeID that was pruned from the log.
+POTHOLE_CHANGES_PRUNED = "potholeChangesPruned"
+
+#Imports datetime, json and sqlalchemy modules.
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+#Imports the all of the required models and controllers.
+from App.models import *
+from App.controllers.dataVersion import getDataVersion, setDataVersion, bumpDataVersionOnConnection
+from App.controllers.potholeSnapshot import POTHOLE_LISTING_VERSION
+from App.controllers.pothole import queryPotholeSummaries, potholeSummaryToDict
+
+#Returns the potholes whose listings are changed by a flush, by potholeID, and whether each of them was deleted.
+#The listing of a pothole includes its number of reports, so creating or deleting a report also changes its pothole.
+def getChangedPotholes(session):
+    changedPotholes = {}
+    for report in list(session.new) + list(session.deleted):
+        if isinstance(report, Report) and report.potholeID != None:
+            changedPotholes[report.potholeID] = False
+    for pothole in list(session.new) + [p for p in session.dirty if session.is_modified(p)]:
+        if isinstance(pothole, Pothole):
+            changedPotholes[pothole.potholeID] = False
+    #Deleted potholes are recorded as tombstones, even if their reports were deleted in the same flush.
+    for pothole in session.deleted:
+        if isinstance(pothole, Pothole):
+            changedPotholes[pothole.potholeID] = True
+    return changedPotholes
+
+#Logs the potholes changed by any flush, and bumps the version of the pothole listing, in the same transaction as the changes, using the connection
+#of the transaction directly.
+@event.listens_for(Session, "after_flush")
+def logPotholeChangesAfterFlush(session, flushContext):
+    changedPotholes = getChangedPotholes(session)
+    if changedPotholes:
+        bumpDataVersionOnConnection(session.connection(), POTHOLE_LISTING_VERSION)
+        now = datetime.utcnow()
+        session.connection().execute(PotholeChange.__table__.insert(), [
+            {"potholeID" : potholeID, "deleted" : deleted, "dateChanged" : now} for (potholeID, deleted) in changedPotholes.items()
+        ])
+
+#Returns the cursor of the latest change to the potholes; the changeID of the latest change, or the last pruned changeID if the log is empty.
+def getPotholeChangeCursor():
+    return max(db.session.query(func.max(PotholeChange.changeID)).scalar() or 0, getDataVersion(POTHOLE_CHANGES_PRUNED))
+
+#Returns the potholes that were created or updated after the cursor, in json form, along with the potholeIDs of the potholes that were deleted, and the
+#cursor from which to synchronize next time. If the changes after the cursor have been pruned, a 'GONE' http status code (410) is returned instead,
+#along with the cursor to use once all of the potholes have been reloaded.
+def getPotholeChanges(since):
+    #Attempts to get the changes to the potholes after the cursor.
+    try:
+        since = int(since)
+        #The cursor is read before the changes, such that changes committed in between are returned again at the next synchronization.
+        cursor = getPotholeChangeCursor()
+        if since < getDataVersion(POTHOLE_CHANGES_PRUNED) or since > cursor:
+            return json.dumps({"error" : "The changes since the cursor are no longer available. Reload all of the potholes.", "cursor" : cursor}), 410
+
+        #Gets each of the potholes changed after the cursor once, through the primary key of the log.
+        changedPotholeIDs = db.session.query(PotholeChange.potholeID).filter(PotholeChange.changeID > since, PotholeChange.changeID <= cursor).distinct()
+        potholes = queryPotholeSummaries().filter(Pothole.potholeID.in_(changedPotholeIDs)).order_by(Pothole.potholeID).all()
+
+        #Changed potholes that no longer exist have been deleted.
+        existingPotholeIDs = set(pothole[0] for pothole in potholes)
+        deletedPotholeIDs = sorted(set(potholeID for (potholeID,) in changedPotholeIDs.all()) - existingPotholeIDs)
+        return json.dumps({"potholes" : [potholeSummaryToDict(p) for p in potholes], "deleted" : deletedPotholeIDs, "cursor" : cursor}), 200
+    except:
+    #If the cursor is invalid, rollback the query and return an error and 'BAD REQUEST' http status code (400).
+        db.session.rollback()
+        return json.dumps({"error" : "Invalid cursor specified."}), 400
+
+#Deletes the changes that are older than the retention period from the log, and returns the number of changes that were deleted.
+def prunePotholeChangeLog():
+    lastPrunedChangeID = db.session.query(func.max(PotholeChange.changeID)).filter(PotholeChange.dateChanged < datetime.utcnow() - timedelta(days=POTHOLE_CHANGE_RETENTION)).scalar()
+    if not lastPrunedChangeID:
+        return 0
+
+    #Records the last pruned change in the same transaction, such that clients with older cursors are asked to reload all of the potholes.
+    pruned = db.session.query(PotholeChange).filter(PotholeChange.changeID <= lastPrunedChangeID).delete(synchronize_session=False)
+    setDataVersion(POTHOLE_CHANGES_PRUNED, lastPrunedChangeID)
+    db.session.commit()
+    return pruned
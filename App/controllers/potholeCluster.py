@@ -0,0 +1,153 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#POTHOLECLUSTER CONTROLLERS - Maintain the clusters of potholes for each zoom level of the map, as the potholes and reports are created and deleted.
+
+#CONSTANTS
+#Specifies the largest zoom level of the map for which clusters are maintained; beyond it, the potholes in the viewport are shown individually.
+CLUSTER_MAX_ZOOM = 15
+#Specifies the number of cells across each map tile, such that a cell is 32 pixels wide on a 256 pixel tile.
+CLUSTER_CELLS_PER_TILE = 8
+
+#Imports json, math and sqlalchemy modules.
+import json, math
+from sqlalchemy import event
+from sqlalchemy.orm import Session, attributes
+from sqlalchemy.dialects import postgresql, sqlite
+
+#Imports the all of the required models and controllers.
+from App.models import *
+from App.controllers.pothole import queryPotholeSummaries
+from App.controllers.dataVersion import DATA_VERSION, bumpDataVersion
+from App.controllers.responseEncoding import encodeListing
+
+#Returns the size, in degrees, of the cells of the grid of a zoom level, where the tiles of the zoom level divide the 360 degrees of longitude.
+def getClusterCellSize(zoom):
+    return 360 / (2 ** zoom) / CLUSTER_CELLS_PER_TILE
+
+#Returns the (row, column) of the cell of the grid of a zoom level that contains the given coordinates.
+def getClusterCell(zoom, latitude, longitude):
+    cellSize = getClusterCellSize(zoom)
+    return (math.floor(latitude / cellSize), math.floor(longitude / cellSize))
+
+#Adds the change in the number of potholes and reports at the coordinates, to the changes of the clusters of every zoom level containing the coordinates.
+def addClusterChange(clusterChanges, latitude, longitude, potholeCount, reportCount):
+    for zoom in range(CLUSTER_MAX_ZOOM + 1):
+        (cellRow, cellColumn) = getClusterCell(zoom, latitude, longitude)
+        change = clusterChanges.setdefault((zoom, cellRow, cellColumn), [0, 0, 0.0, 0.0])
+        change[0] += potholeCount
+        change[1] += reportCount
+        change[2] += latitude * potholeCount
+        change[3] += longitude * potholeCount
+
+#Applies the changes of the clusters, by (zoom, cellRow, cellColumn), using the connection of the current transaction directly.
+#The changes are added to the clusters atomically, such that workers changing the same cluster at the same time do not overwrite each other.
+def applyClusterChanges(connection, clusterChanges):
+    changes = [
+        {"zoom" : zoom, "cellRow" : cellRow, "cellColumn" : cellColumn, "potholeCount" : potholeCount, "reportCount" : reportCount, "latitudeSum" : latitudeSum, "longitudeSum" : longitudeSum}
+        for ((zoom, cellRow, cellColumn), (potholeCount, reportCount, latitudeSum, longitudeSum)) in clusterChanges.items()
+        if potholeCount or reportCount or latitudeSum or longitudeSum
+    ]
+    if not changes:
+        return
+
+    #Creates the clusters that do not exist, and adds the changes to those that do, using the upsert of the database.
+    table = PotholeCluster.__table__
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    upsert = dialect.insert(table)
+    connection.execute(upsert.on_conflict_do_update(
+        index_elements=[table.c.zoom, table.c.cellRow, table.c.cellColumn],
+        set_={
+            "potholeCount" : table.c.potholeCount + upsert.excluded.potholeCount,
+            "reportCount" : table.c.reportCount + upsert.excluded.reportCount,
+            "latitudeSum" : table.c.latitudeSum + upsert.excluded.latitudeSum,
+            "longitudeSum" : table.c.longitudeSum + upsert.excluded.longitudeSum
+        }
+    ), changes)
+
+    #Deletes the clusters that no longer have any potholes.
+    removed = [change for change in changes if change["potholeCount"] < 0]
+    if removed:
+        connection.execute(table.delete().where(
+            table.c.zoom == db.bindparam("zoom"), table.c.cellRow == db.bindparam("cellRow"), table.c.cellColumn == db.bindparam("cellColumn"), table.c.potholeCount <= 0
+        ), removed)
+
+#Returns the pothole of a report that is being flushed, from the session if it has been loaded, or None if the report has no pothole.
+def getReportPothole(session, report):
+    return report.reports or (session.get(Pothole, report.potholeID) if report.potholeID != None else None)
+
+#Updates the clusters with the potholes and reports that are created, deleted or moved by a flush, in the same transaction as the flush.
+#The clusters are updated before the flush, while the coordinates of moved potholes, and the potholes of deleted reports, can still be read.
+@event.listens_for(Session, "before_flush")
+def updateClustersBeforeFlush(session, flushContext, instances):
+    clusterChanges = {}
+    for instance in session.new:
+        if isinstance(instance, Pothole):
+            addClusterChange(clusterChanges, instance.latitude, instance.longitude, 1, 0)
+        elif isinstance(instance, Report):
+            pothole = getReportPothole(session, instance)
+            if pothole:
+                addClusterChange(clusterChanges, pothole.latitude, pothole.longitude, 0, 1)
+
+    for instance in session.deleted:
+        if isinstance(instance, Pothole):
+            addClusterChange(clusterChanges, instance.latitude, instance.longitude, -1, 0)
+        elif isinstance(instance, Report):
+            pothole = getReportPothole(session, instance)
+            if pothole:
+                addClusterChange(clusterChanges, pothole.latitude, pothole.longitude, 0, -1)
+
+    #Moves potholes whose coordinates were changed, along with their stored reports, from the clusters of their previous coordinates.
+    #The previous coordinates are read from the database, as they are not kept by the pothole if it was expired before being changed.
+    for instance in session.dirty:
+        if isinstance(instance, Pothole) and instance not in session.deleted:
+            if attributes.get_history(instance, "latitude").has_changes() or attributes.get_history(instance, "longitude").has_changes():
+                (previousLatitude, previousLongitude, reportCount) = session.connection().execute(
+                    db.select(Pothole.latitude, Pothole.longitude, db.select(db.func.count(Report.reportID)).where(Report.potholeID == Pothole.potholeID).scalar_subquery())
+                    .where(Pothole.potholeID == instance.potholeID)
+                ).one()
+                addClusterChange(clusterChanges, previousLatitude, previousLongitude, -1, -reportCount)
+                addClusterChange(clusterChanges, instance.latitude, instance.longitude, 1, reportCount)
+
+    applyClusterChanges(session.connection(), clusterChanges)
+
+#Retrieves the clusters of a zoom level, optionally within the viewport given by the bounding box, in the form 'minLongitude,minLatitude,maxLongitude,maxLatitude',
+#and returns their dictionary definitions in an array, in json form, as well as an 'OK' http status code (200).
+def getPotholeClusters(zoom, bbox=None):
+    #Attempts to get and return the clusters of the zoom level.
+    try:
+        zoom = int(zoom)
+        #If the zoom level is not clustered, return an error and 'BAD REQUEST' http status code (400).
+        if not 0 <= zoom <= CLUSTER_MAX_ZOOM:
+            return json.dumps({"error": "Invalid zoom specified. Clusters are available for zoom levels 0 to " + str(CLUSTER_MAX_ZOOM) + "."}), 400
+
+        #Selects the clusters of the zoom level, using the range of cells overlapping the viewport, if any.
+        clusters = db.session.query(PotholeCluster).filter(PotholeCluster.zoom == zoom)
+        if bbox:
+            (minLongitude, minLatitude, maxLongitude, maxLatitude) = [float(value) for value in bbox.split(",")]
+            (minRow, minColumn) = getClusterCell(zoom, minLatitude, minLongitude)
+            (maxRow, maxColumn) = getClusterCell(zoom, maxLatitude, maxLongitude)
+            clusters = clusters.filter(PotholeCluster.cellRow.between(minRow, maxRow), PotholeCluster.cellColumn.between(minColumn, maxColumn))
+
+        #Returns the json form of the clusters, ordered by their cells, and an OK http status code (200).
+        clusterData = [c.toDict() for c in clusters.order_by(PotholeCluster.cellRow, PotholeCluster.cellColumn).all()]
+        return encodeListing(clusterData), 200
+    except:
+    #If the zoom level or viewport is invalid, rollback the query and return an error and 'BAD REQUEST' http status code (400).
+        db.session.rollback()
+        return json.dumps({"error": "Invalid zoom or viewport specified."}), 400
+
+#Rebuilds the clusters of every zoom level from all of the potholes, and returns the number of clusters.
+def rebuildPotholeClusters():
+    #Accumulates the clusters of all of the potholes, reading only the coordinates and number of reports of each pothole.
+    clusterChanges = {}
+    for (potholeID, longitude, latitude, numReports, expiryDate) in queryPotholeSummaries():
+        addClusterChange(clusterChanges, latitude, longitude, 1, numReports)
+
+    #Replaces the clusters in a single transaction, and records the change to the served data.
+    db.session.query(PotholeCluster).delete(synchronize_session=False)
+    applyClusterChanges(db.session.connection(), clusterChanges)
+    bumpDataVersion(DATA_VERSION)
+    db.session.commit()
+    return db.session.query(PotholeCluster).count()
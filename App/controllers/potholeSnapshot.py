@@ -0,0 +1,109 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#POTHOLESNAPSHOT CONTROLLERS - Publish the pothole listing, and the coordinates of the potholes, to a snapshot file that is memory-mapped by every worker.
+
+#CONSTANTS
+#Specifies the identifier at the start of each snapshot file, which is incremented whenever the layout of the snapshot file is changed.
+POTHOLE_SNAPSHOT_MAGIC = b"SDPSNAP2"
+#Specifies the layout of the header of a snapshot file; its identifier, the versions of the listing and potholes at which it was published, the length of the
+#listing, and the number of potholes. The listing follows the header, and is followed by the (potholeID, latitude, longitude) of each pothole, as doubles.
+POTHOLE_SNAPSHOT_HEADER = "<8sqqqq"
+#Specifies the name of the data version that is bumped whenever the listing of the potholes is changed; when potholes are created, updated or deleted,
+#or when their reports are created or deleted. Unlike the data version, it is not bumped by changes to votes, images or users.
+POTHOLE_LISTING_VERSION = "potholeListing"
+
+#Imports array, mmap, os, struct, sys, tempfile, contextlib and flask modules.
+import mmap, os, struct, sys, tempfile
+from array import array
+from contextlib import contextmanager
+from flask import current_app
+
+#Imports the fcntl module, used to elect the worker that publishes a snapshot; snapshots are not published on platforms without it.
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#Defines a snapshot file that has been memory-mapped, such that its listing and coordinates are read from the pages shared by all of the workers.
+class PotholeSnapshot:
+    #Maps the snapshot file that is open as the given file object.
+    def __init__(self, f):
+        self.inode = os.fstat(f.fileno()).st_ino
+        self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        headerSize = struct.calcsize(POTHOLE_SNAPSHOT_HEADER)
+        (magic, self.listingVersion, self.potholeVersion, listingLength, potholeCount) = struct.unpack_from(POTHOLE_SNAPSHOT_HEADER, self.map)
+        if magic != POTHOLE_SNAPSHOT_MAGIC:
+            raise ValueError("Invalid pothole snapshot file.")
+
+        #The listing and coordinates are views of the mapped file, rather than copies of it.
+        self.listing = memoryview(self.map)[headerSize : headerSize + listingLength]
+        coordinatesStart = getCoordinatesOffset(headerSize + listingLength)
+        self.coordinates = memoryview(self.map)[coordinatesStart : coordinatesStart + potholeCount * 24].cast("d")
+        #The coordinates are stored in little-endian byte order, and are copied on platforms that are not.
+        if sys.byteorder == "big":
+            self.coordinates = array("d", self.coordinates)
+            self.coordinates.byteswap()
+
+    #Returns the (potholeID, latitude, longitude) of each of the potholes of the snapshot.
+    def getPotholeRows(self):
+        coordinates = self.coordinates
+        return [(int(coordinates[i]), coordinates[i + 1], coordinates[i + 2]) for i in range(0, len(coordinates), 3)]
+
+#Returns the offset of the coordinates in a snapshot file, after the listing, aligned to the size of a double.
+def getCoordinatesOffset(listingEnd):
+    return (listingEnd + 7) // 8 * 8
+
+#Writes a snapshot file of the listing, as bytes, and the flat array of (potholeID, latitude, longitude) of the potholes, at the given versions.
+#The snapshot is written to a temporary file which then replaces the snapshot file, such that workers never map a partially written snapshot.
+def writePotholeSnapshot(snapshotFile, listingVersion, potholeVersion, listing, coordinates):
+    if sys.byteorder == "big":
+        coordinates = array("d", coordinates)
+        coordinates.byteswap()
+    header = struct.pack(POTHOLE_SNAPSHOT_HEADER, POTHOLE_SNAPSHOT_MAGIC, listingVersion, potholeVersion, len(listing), len(coordinates) // 3)
+    listingEnd = len(header) + len(listing)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(snapshotFile)), delete=False) as temp:
+        temp.write(header)
+        temp.write(listing)
+        temp.write(b"\0" * (getCoordinatesOffset(listingEnd) - listingEnd))
+        coordinates.tofile(temp)
+    os.replace(temp.name, snapshotFile)
+
+#Attempts to acquire the lock of the snapshot file without waiting, such that a single worker publishes each snapshot. Yields whether the lock was acquired.
+@contextmanager
+def lockPotholeSnapshot(snapshotFile):
+    if fcntl == None:
+        yield False
+        return
+    with open(snapshotFile + ".lock", "a") as lockFile:
+        try:
+            fcntl.flock(lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+#Returns the path of the snapshot file configured by the application, or None if no snapshot file is configured.
+def getPotholeSnapshotFile():
+    return current_app.config.get("POTHOLE_SNAPSHOT_FILE")
+
+#Returns the latest published snapshot, mapping it again once it has been replaced, or None if no snapshot file is configured or has been published.
+#Snapshots that have been replaced remain mapped until the responses that are reading them have been sent.
+def getPotholeSnapshot():
+    snapshotFile = getPotholeSnapshotFile()
+    if not snapshotFile:
+        return None
+    snapshot = current_app.extensions.get("potholeSnapshot")
+    try:
+        if snapshot and os.stat(snapshotFile).st_ino == snapshot.inode:
+            return snapshot
+        with open(snapshotFile, "rb") as f:
+            snapshot = PotholeSnapshot(f)
+    except (OSError, ValueError):
+        return None
+    current_app.extensions["potholeSnapshot"] = snapshot
+    return snapshot
@@ -11,92 +11,228 @@ DISTANCE_THRESHOLD = 15
 EXPIRY_DATE_REFRESH = 60
 #Specifies the number of days that a pothole record should be initialized with, before they are deleted.
 EXPIRY_DATE_PRIMARY = 60
-
-#Imports geopy, datetime and json.
-from geopy import distance
+#Specifies the approximate number of meters spanned by a single degree of latitude, used to convert distances into coordinate ranges.
+METERS_PER_DEGREE = 111320
+#Specifies the mean radius of the earth, in meters, used in calculating the distance between coordinates.
+EARTH_RADIUS = 6371008.8
+#Specifies the maximum number of points that can be submitted in a single batch of driver reports.
+DRIVER_BATCH_LIMIT = 500
+#Specifies the number of reports returned for each page of a report listing when no limit is given, and the largest limit that can be given.
+REPORT_PAGE_DEFAULT_LIMIT = 500
+REPORT_PAGE_MAX_LIMIT = 2000
+
+#Imports datetime, math, json and sqlalchemy loading options.
 from datetime import datetime, timedelta
-import json, requests
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload, selectinload
+import json, math
 
 #Imports the all of the required models and controllers.
 from App.models import *
 from App.controllers import *
-from App.controllers.pothole import deletePothole
-from App.controllers.reportedImage import is_url_image, uploadImage
+from App.controllers.pothole import deletePothole, STREAM_BATCH_SIZE
+from App.controllers.potholeCache import PotholeCache, getPotholeCache, syncPotholeCache, bumpPotholeCacheVersion, cachePotholeCreated, cachePotholesCreated
+from App.controllers.reportedImage import queueReportImages
+from App.controllers.snapCache import getCachedSnap, getCachedSnaps, cacheSnap, cacheSnaps
+from App.controllers.osrm import getOSRMClient
+from App.controllers.roadNetwork import getRoadNetwork
+from App.controllers.responseEncoding import encodeListingStream
 from App.controllers.reportedImage import deleteAllReportImagesFromStorage, deleteImageFromStorage
 
-#Returns a json dump of all of the reports in the database.
-def getReportData():
-    #Attempts to get and return all of the potholes in the database in json form.
+#Returns a query for reports that eagerly loads the votes, images and user of the reports; as required by the report dictionary definition.
+#The votes and images of all of the reports are loaded using a single query each, rather than a query per report.
+#The reports are ordered by (dateReported, reportID), such that the listing of an unchanged dataset is identical for its ETag, and can be paged by its keys.
+def queryReports():
+    return db.session.query(Report).options(selectinload(Report.votes), selectinload(Report.reportedImages), joinedload(Report.user)).order_by(Report.dateReported, Report.reportID)
+
+#Returns the reports matching the criteria on the page after the cursor, in the form 'dateReported,reportID' of the last report of the previous page,
+#as well as the headers of the page. If there are more reports after the page, the cursor of its last report is returned in the 'X-Next-Cursor' header.
+#The reports after the cursor are found through the index on (dateReported, reportID), such that each page is found without reading the previous pages.
+def queryReportPage(criteria, limit, cursor):
+    cursorKeys = parseReportPageCursor(cursor)
+    if cursorKeys:
+        criteria = criteria + [tuple_(Report.dateReported, Report.reportID) > cursorKeys]
+
+    #Reads the keys of the page, and of the first report after it, without loading the reports, to determine the cursor before the page is streamed.
+    keys = db.session.query(Report.dateReported, Report.reportID).filter(*criteria).order_by(Report.dateReported, Report.reportID).limit(limit + 1).all()
+    pageHeaders = {}
+    if len(keys) > limit:
+        pageHeaders["X-Next-Cursor"] = keys[limit - 1][0].strftime("%Y-%m-%d") + "," + str(keys[limit - 1][1])
+
+    #Executes the query for the reports of the page, which are then loaded in batches as their dictionary definitions are streamed.
+    reports = iter(queryReports().filter(*criteria).limit(limit).yield_per(STREAM_BATCH_SIZE))
+    return reports, pageHeaders
+
+#Returns the (dateReported, reportID) keys of a cursor in the form 'dateReported,reportID', or None if no cursor is given.
+#Raises a ValueError if the cursor is not of that form.
+def parseReportPageCursor(cursor):
+    if not cursor:
+        return None
+    (dateReported, reportID) = cursor.split(",")
+    return (datetime.strptime(dateReported, "%Y-%m-%d").date(), int(reportID))
+
+#Determines whether the cursor of a page of reports is either not given, or of the form 'dateReported,reportID'.
+def isValidReportPageCursor(cursor):
+    try:
+        parseReportPageCursor(cursor)
+        return True
+    except ValueError:
+        return False
+
+#Returns a json dump of a page of at most 'limit' of the reports in the database, after the cursor. If there are more reports, the cursor of the next page
+#is also returned in the 'X-Next-Cursor' header.
+def getReportData(limit=None, cursor=None):
+    #Attempts to get and return the page of the reports in the database in json form.
     try:
-        #Gets all of the reports in the database, gets the dictionary definitions, and returns them all in an array.
-        #Also returns a 'OK' http status code (200)
-        reports = db.session.query(Report).all()
-        reportData = [r.toDict() for r in reports]
-        return json.dumps(reportData), 200
+        limit = int(limit) if limit else REPORT_PAGE_DEFAULT_LIMIT
+        #If the limit is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if not 0 < limit <= REPORT_PAGE_MAX_LIMIT:
+            return json.dumps({"error": "Invalid limit specified. The limit must be between 1 and " + str(REPORT_PAGE_MAX_LIMIT) + "."}), 400
+        #If the cursor is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if not isValidReportPageCursor(cursor):
+            return json.dumps({"error": "Invalid cursor specified."}), 400
+
+        #Gets the page of the reports, whose dictionary definitions are streamed along with their votes, images and users.
+        #Also returns a 'OK' http status code (200), and the cursor of the next page if there is one.
+        (reports, pageHeaders) = queryReportPage([], limit, cursor)
+        if pageHeaders:
+            return encodeListingStream(reports, Report.toDict), 200, pageHeaders
+        return encodeListingStream(reports, Report.toDict), 200
     except:
     #If an error was encountered in getting the pothole data, rollback the query (querying invalid datatype crashes POSTGRES database ONLY)
         db.session.rollback()
         return json.dumps({"error": "Invalid pothole reports in database."}), 400
 
 
-#Returns a json dump of all of the reports for a particular user in the database.
-def getReportDataForUser(user):
-    #Attempts to get and return all of the potholes by a particular user in the database in json form.
+#Returns a json dump of a page of at most 'limit' of the reports for a particular user in the database, after the cursor. If there are more reports,
+#the cursor of the next page is also returned in the 'X-Next-Cursor' header.
+def getReportDataForUser(user, limit=None, cursor=None):
+    #Attempts to get and return the page of the reports by a particular user in the database in json form.
     try:
-        #Gets all of the user reports in the database, gets the dictionary definitions, and returns them all in an array.
-        #Also returns a 'OK' http status code (200)
-        reports = db.session.query(Report).filter_by(userID=user.userID).all()
-        reportData = [r.toDict() for r in reports]
-        return json.dumps(reportData), 200
+        limit = int(limit) if limit else REPORT_PAGE_DEFAULT_LIMIT
+        #If the limit is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if not 0 < limit <= REPORT_PAGE_MAX_LIMIT:
+            return json.dumps({"error": "Invalid limit specified. The limit must be between 1 and " + str(REPORT_PAGE_MAX_LIMIT) + "."}), 400
+        #If the cursor is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if not isValidReportPageCursor(cursor):
+            return json.dumps({"error": "Invalid cursor specified."}), 400
+
+        #Gets the page of the user's reports, whose dictionary definitions are streamed.
+        #Also returns a 'OK' http status code (200), and the cursor of the next page if there is one.
+        (reports, pageHeaders) = queryReportPage([Report.userID == user.userID], limit, cursor)
+        if pageHeaders:
+            return encodeListingStream(reports, Report.toDict), 200, pageHeaders
+        return encodeListingStream(reports, Report.toDict), 200
     except:
     #If an error was encountered in getting the pothole data, rollback the query (querying invalid datatype crashes POSTGRES database ONLY)
         db.session.rollback()
         return json.dumps({"error": "Invalid pothole reports in database."}), 400
 
+#Given a latitude, longitude and a radius in meters, returns the bounding box (minLatitude, maxLatitude, minLongitude, maxLongitude)
+#that contains every point within the radius of the coordinates.
+def getBoundingBox(latitude, longitude, radius):
+    #Calculates the span of the radius in degrees. Degrees of longitude shrink towards the poles, so the longitude span is widened accordingly.
+    latitudeDelta = radius / METERS_PER_DEGREE
+    longitudeDelta = radius / (METERS_PER_DEGREE * math.cos(math.radians(latitude)))
+    return (latitude - latitudeDelta, latitude + latitudeDelta, longitude - longitudeDelta, longitude + longitudeDelta)
+
+#Returns the distance, in meters, between two sets of coordinates using the haversine formula.
+def haversineDistance(latitude1, longitude1, latitude2, longitude2):
+    latitudeDelta = math.radians(latitude2 - latitude1)
+    longitudeDelta = math.radians(longitude2 - longitude1)
+    a = math.sin(latitudeDelta / 2) ** 2 + math.cos(math.radians(latitude1)) * math.cos(math.radians(latitude2)) * math.sin(longitudeDelta / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+#Given the latitude and longitude for a report, returns the potholeID of the closest pothole in the grid of a pothole cache,
+#within the threshold distance specified by DISTANCE_THRESHOLD. Returns None if there is no pothole close enough.
+def findClosestCachedPothole(cache, latitude, longitude):
+    #Initializes the closestPotholeID to None; there is no selected pothole that is close enough.
+    closestPotholeID = None
+    #Sets the smallest distance to the nearest pothole to the distance threshold value.
+    smallestDistance = DISTANCE_THRESHOLD
+
+    #Gets only the cached potholes within the bounding box of the distance threshold.
+    (minLatitude, maxLatitude, minLongitude, maxLongitude) = getBoundingBox(latitude, longitude, DISTANCE_THRESHOLD)
+    candidatePotholes = cache.findInBoundingBox(minLatitude, maxLatitude, minLongitude, maxLongitude)
+    #Iterates over the candidate potholes and calculates the distance between the pothole and the report location.
+    for (potholeID, potholeLatitude, potholeLongitude) in candidatePotholes:
+        distanceBetweenPotholes = haversineDistance(potholeLatitude, potholeLongitude, latitude, longitude)
+
+        #If the distance between the current pothole is less than the smallest distance, select the current pothole.
+        #This effectively finds the nearest pothole, within the distance threshold, that the report can be matched to.
+        if distanceBetweenPotholes < smallestDistance:
+            closestPotholeID = potholeID
+            smallestDistance = distanceBetweenPotholes
+
+    return closestPotholeID
+
 #Given the latitude and logitude for a report, finds the closest pothole within a threshold distance specified by DISTANCE_THRESHOLD
 def findClosestPothole(latitude, longitude):
     #Attempts to find the closest pothole.
     try:
-        #Initializes the finalPothole to None; there is no selected pothole that is close enough.
-        finalPothole = None
-        #Creates a tuple using the latitude and longitude reported.
-        newPotholeCoords = (latitude, longitude)
-        
-        #Sets the smallest distance to the nearest pothole to the distance threshold value.
-        smallestDistance = DISTANCE_THRESHOLD
-
-        #Gets all of the potholes in the database.
-        potholeQuery = db.session.query(Pothole).all()
-        #Iterates over all of the potholes in the database and calculates the distance between the pothole and the report location.
-        for pothole in potholeQuery:
-            centerPotholeCoords = (pothole.latitude, pothole.longitude)
-            distanceBetweenPotholes = distance.distance(centerPotholeCoords, newPotholeCoords) * 1000
-
-            #If the distance between the current pothole is less than the smallest distance, set the finalPothole to match the current pothole.
-            #This effectively finds the nearest pothole, within the distance threshold, that the report can be matched to.
-            if distanceBetweenPotholes < smallestDistance:                
-                finalPothole = pothole
-
-        #Returns the final pothole to be used for the report.
-        return finalPothole
+        #Ensures that the pothole cache is up to date, and finds the closest of the cached potholes.
+        syncPotholeCache()
+        closestPotholeID = findClosestCachedPothole(getPotholeCache(), latitude, longitude)
+
+        #Returns the final pothole to be used for the report, if one was found.
+        #If the pothole was deleted by another worker since the cache was synchronized, no pothole is returned.
+        if closestPotholeID:
+            return db.session.query(Pothole).get(closestPotholeID)
+        return None
     except:
     #If an error is encountered, return an error message.
         return "error"
 
 #Given a set of coordinates, longitude and latitude, will attempt to use the OSRM server to correct the coordinates of the report.
 def snapCoordsToStreet(latitude, longitude):
-    #Converts the coordinates to strings.
-    latitude = str(latitude)
-    longitude = str(longitude)
-    #Sends a request to the OSRM server and stores the result.
-    r = requests.get('http://osrm.justinbaldeo.com/nearest/v1/driving/' + longitude + ',' + latitude)
-    #If the status code of the request is 200, convert the response to json and return the location coordinates.
-    if r.status_code == 200:
-        jsonReq = r.json()
-        return jsonReq["waypoints"][0]["location"][1], jsonReq["waypoints"][0]["location"][0]
+    #If a local road network is configured, snaps the coordinates in-process, without contacting the OSRM server.
+    roadNetwork = getRoadNetwork()
+    if roadNetwork:
+        snappedCoords = roadNetwork.nearest(latitude, longitude)
+        if not snappedCoords:
+            raise Exception("No road was found near the coordinates.")
+        return snappedCoords
+
+    #Returns the cached coordinates, if the location has been snapped recently by any worker.
+    snappedCoords = getCachedSnap(latitude, longitude)
+    if snappedCoords:
+        return snappedCoords
+
+    #Otherwise, snaps the coordinates using the OSRM server and caches the result.
+    snappedCoords = requestSnappedCoords(latitude, longitude)
+    cacheSnap(latitude, longitude, snappedCoords)
+    return snappedCoords
+
+#Snaps each of the given (latitude, longitude) coordinates to the nearest street, and returns the snapped coordinates in the same order. Coordinates
+#that cannot be snapped are returned unchanged. Locations that are not cached are snapped by the OSRM server in a single concurrent batch.
+def snapCoordsBatch(coordinates):
+    #If a local road network is configured, snaps the coordinates in-process.
+    roadNetwork = getRoadNetwork()
+    if roadNetwork:
+        snappedCoords = roadNetwork.nearestMany(coordinates)
     else:
-    #Otherwise raise an exception.
-        raise Exception("OSRM server did not return a valid response.")
+        #Otherwise, looks up all of the locations in the cache, and snaps the missed locations using the OSRM server.
+        snappedCoords = getCachedSnaps(coordinates)
+        missedIndexes = [i for (i, coords) in enumerate(snappedCoords) if coords == None]
+        if missedIndexes:
+            requestedCoords = requestSnappedCoordsBatch([coordinates[i] for i in missedIndexes])
+            for (i, coords) in zip(missedIndexes, requestedCoords):
+                snappedCoords[i] = coords
+            #Caches the locations that were snapped successfully.
+            cacheSnaps([(coordinates[i], snappedCoords[i]) for i in missedIndexes if snappedCoords[i]])
+
+    #Retains the original coordinates of the locations that could not be snapped.
+    return [coords or original for (coords, original) in zip(snappedCoords, coordinates)]
+
+#Snaps each of the given (latitude, longitude) coordinates using the OSRM server, and returns the snapped coordinates in the same order, or None for
+#each of the coordinates that could not be snapped.
+def requestSnappedCoordsBatch(coordinates):
+    return getOSRMClient().nearestMany(coordinates)
+
+#Snaps the coordinates to the nearest street using the OSRM server, and returns the snapped (latitude, longitude).
+def requestSnappedCoords(latitude, longitude):
+    #Raises an error within the configured deadline, or immediately while the OSRM server is failing, such that the raw coordinates are used instead.
+    return getOSRMClient().nearest(latitude, longitude)
 
 #Validates a report of a user via the standard interface before adding it to the database.
 def reportPotholeStandard(user, reportDetails, Testing=False):
@@ -136,7 +272,11 @@ def reportPotholeStandard(user, reportDetails, Testing=False):
                         #Creates the report using the report details, adds the report to the database, and commits the changes.
                         newPothole = Pothole(longitude=reportDetails["longitude"], latitude=reportDetails["latitude"], expiryDate=datetime.now() + timedelta(days=EXPIRY_DATE_PRIMARY))
                         db.session.add(newPothole)
+                        potholeVersion = bumpPotholeCacheVersion()
+                        newPotholeRow = (newPothole.potholeID, newPothole.latitude, newPothole.longitude)
                         db.session.commit()
+                        #Adds the new pothole to the pothole cache once it has been committed.
+                        cachePotholeCreated(*newPotholeRow, potholeVersion)
 
                         #Sets the selected finalPothole to this new pothole object.
                         finalPothole = newPothole
@@ -161,6 +301,8 @@ def reportPotholeStandard(user, reportDetails, Testing=False):
                         #Otherwise, the pothole could not be updated. Rollback the database and return an error with a 'INTERNAL SERVER ERROR' https tatus code (500).
                             db.session.rollback()
                             return {"error": "Unable to update expiry date!"}, 500
+                #Initializes the image slots of the report, which are returned with the outcome of the report.
+                imageSlots = []
                 #Attempts to create a report for the pothole.
                 try:
                     #Creates a new report for the finalPothole using the description.
@@ -169,23 +311,10 @@ def reportPotholeStandard(user, reportDetails, Testing=False):
                     db.session.add(newReport)
                     db.session.commit()
 
-                    #If there are images in the reportDetails, add the images to the report.
+                    #If there are images in the reportDetails, add a slot for each image to the report. The images are processed in the background,
+                    #and their slots are filled in once they have been uploaded.
                     if "images" in reportDetails:
-                        #Iterates over the images within the images field of the reportDetails and adds them to the reportedImage database.
-                        for base64Image in reportDetails["images"]:
-                            imageURL = uploadImage(base64Image, Testing)
-                            #Determines if the URL is valid and leads to an image.
-                            if is_url_image(imageURL):
-                                #If valid, add the imageURL to the reportedImage database for the reportID.
-                                try:
-                                    #Creates image record using report details, adds to database, and commits changes.
-                                    reportImage = ReportedImage(reportID=newReport.reportID, imageURL=imageURL)
-                                    db.session.add(reportImage)
-                                    db.session.commit()
-                                except:
-                                #Otherwise, rollback the changes for the database and print an appropriate error.
-                                    db.session.rollback()
-                                    print("Unable to add this image to database.")
+                        imageSlots = queueReportImages(newReport.reportID, reportDetails["images"], Testing)
 
                     #Once a new report has been created for a pothole, update the expiry date for the pothole.
                     #Attempt to update the expiry date of the pothole.
@@ -203,7 +332,7 @@ def reportPotholeStandard(user, reportDetails, Testing=False):
                     db.session.rollback()
                     return {"error": "Unable to add report to database! Ensure that all fields are filled out."}, 500
 
-                return {"message" : "Successfully added pothole report to database!"}, 201
+                return {"message" : "Successfully added pothole report to database!", "images" : imageSlots}, 201
             #Otherwise, the coordinates reported are outside of Trinidad and Tobago. Return an error and 'BAD REQUEST' http status code (400).
             else:
                 return {"error" : "The coordinates are not in Trinidad and Tobago!"}, 400
@@ -251,7 +380,11 @@ def reportPotholeDriver(user, reportDetails):
                         #Creates the report using the report details, adds the report to the database, and commits the changes.
                         newPothole = Pothole(longitude=reportDetails["longitude"], latitude=reportDetails["latitude"], expiryDate=datetime.now() + timedelta(days=EXPIRY_DATE_PRIMARY))
                         db.session.add(newPothole)
+                        potholeVersion = bumpPotholeCacheVersion()
+                        newPotholeRow = (newPothole.potholeID, newPothole.latitude, newPothole.longitude)
                         db.session.commit()
+                        #Adds the new pothole to the pothole cache once it has been committed.
+                        cachePotholeCreated(*newPotholeRow, potholeVersion)
                         #Sets the selected finalPothole to this new pothole object.
                         finalPothole = newPothole
                     #Otherwise, if a pothole cannot be created, rollback the database and return an error with 'INTERNAL SERVER ERROR' status code.
@@ -312,6 +445,105 @@ def reportPotholeDriver(user, reportDetails):
         return {"error": "Invalid report details specified."}, 400
 
 
+#Validates a batch of reports of a user via the driver interface, and adds all of them to the database in a single transaction.
+def reportPotholeDriverBatch(user, batchDetails):
+    #Attempts to process the batch of driver reports.
+    try:
+        if user.banned:
+            return {"error": "User is banned."}, 403
+
+        #Determines if the batchDetails contains a non-empty array of points for processing.
+        if not batchDetails or "points" not in batchDetails or not isinstance(batchDetails["points"], list) or not batchDetails["points"]:
+            return {"error" : "Invalid report details submitted!"}, 400
+
+        #If there are too many points in the batch, return an error and 'BAD REQUEST' http status code (400).
+        if len(batchDetails["points"]) > DRIVER_BATCH_LIMIT:
+            return {"error" : "Too many reports submitted! At most " + str(DRIVER_BATCH_LIMIT) + " reports can be submitted at once."}, 400
+
+        #Keeps only the points in the batch that are within Trinidad and Tobago.
+        validPoints = []
+        rejectedCount = 0
+        for point in batchDetails["points"]:
+            if "longitude" in point and "latitude" in point and -61.965556 < point["longitude"] < -60.469077 and 10.028088 < point["latitude"] < 11.370345:
+                validPoints.append((point["latitude"], point["longitude"]))
+            else:
+                rejectedCount += 1
+
+        #Snaps all of the points to the streets at once, retaining the original values of the points that could not be snapped; in the event of osrm server failure.
+        #Points within the distance threshold of a previous point in the batch refer to the same pothole, and are discarded.
+        batchCache = PotholeCache()
+        batchPoints = []
+        for (latitude, longitude) in snapCoordsBatch(validPoints):
+            if findClosestCachedPothole(batchCache, latitude, longitude) == None:
+                batchCache.add(len(batchPoints), latitude, longitude)
+                batchPoints.append((latitude, longitude))
+
+        #If none of the points in the batch are within Trinidad and Tobago, return an error and 'BAD REQUEST' http status code (400).
+        if not batchPoints:
+            return {"error" : "The coordinates are not in Trinidad and Tobago!"}, 400
+
+        #Matches all of the points in the batch against the potholes in the pothole cache.
+        syncPotholeCache()
+        potholeCache = getPotholeCache()
+        matchedPotholeIDs = [findClosestCachedPothole(potholeCache, latitude, longitude) for (latitude, longitude) in batchPoints]
+
+        #Gets all of the matched potholes, and the matched potholes that have already been reported by the user, using a single query each.
+        existingPotholeIDs = set(potholeID for potholeID in matchedPotholeIDs if potholeID)
+        existingPotholes = {}
+        reportedPotholeIDs = set()
+        if existingPotholeIDs:
+            existingPotholes = {pothole.potholeID : pothole for pothole in db.session.query(Pothole).filter(Pothole.potholeID.in_(existingPotholeIDs)).all()}
+            reportedPotholeIDs = set(potholeID for (potholeID,) in db.session.query(Report.potholeID).filter(Report.userID == user.userID, Report.potholeID.in_(existingPotholeIDs)).all())
+
+        #Attempts to add all of the reports of the batch to the database.
+        try:
+            #Creates a new pothole for each of the points that could not be mapped to an existing pothole.
+            newPotholes = []
+            for ((latitude, longitude), potholeID) in zip(batchPoints, matchedPotholeIDs):
+                if potholeID not in existingPotholes:
+                    newPotholes.append(Pothole(longitude=longitude, latitude=latitude, expiryDate=datetime.now() + timedelta(days=EXPIRY_DATE_PRIMARY)))
+            db.session.add_all(newPotholes)
+            db.session.flush()
+
+            #Iterates over the potholes for the points in the batch, and files a report for each of them.
+            reportedCount = 0
+            refreshedCount = 0
+            newPotholeIterator = iter(newPotholes)
+            for potholeID in matchedPotholeIDs:
+                pothole = existingPotholes[potholeID] if potholeID in existingPotholes else next(newPotholeIterator)
+
+                #If the user has already reported the pothole, the resubmission only resets the expiry date of the pothole.
+                if pothole.potholeID in reportedPotholeIDs:
+                    pothole.expiryDate = datetime.now() + timedelta(days=EXPIRY_DATE_REFRESH)
+                    refreshedCount += 1
+                #Otherwise, creates a new report for the pothole and updates the expiry date of the pothole.
+                else:
+                    db.session.add(Report(userID=user.userID, potholeID=pothole.potholeID, description="Pothole submitted via Driver Mode."))
+                    pothole.expiryDate = datetime.now() + timedelta(days=30)
+                    reportedPotholeIDs.add(pothole.potholeID)
+                    reportedCount += 1
+
+            #If new potholes were created, record the change to the potholes in the same transaction.
+            if newPotholes:
+                potholeVersion = bumpPotholeCacheVersion()
+                newPotholeRows = [(pothole.potholeID, pothole.latitude, pothole.longitude) for pothole in newPotholes]
+            db.session.commit()
+
+            #Adds the new potholes to the pothole cache once they have been committed.
+            if newPotholes:
+                cachePotholesCreated(newPotholeRows, potholeVersion)
+        except:
+        #Otherwise, if the reports cannot be added, rollback the database and return an error and a 'INTERNAL SERVER ERROR' http status code (500).
+            db.session.rollback()
+            return {"error": "Unable to add reports to database!"}, 500
+
+        #Returns a success message with the outcome of the batch, and a 'CREATED' http status code (201).
+        return {"message" : "Successfully added driver reports to database!", "reported" : reportedCount, "refreshed" : refreshedCount, "rejected" : rejectedCount}, 201
+    except:
+    #Rolls back the database in the event of invalid report details (particularly datatype) being submitted.
+        db.session.rollback()
+        return {"error": "Invalid report details specified."}, 400
+
 #SYSTEM POTHOLE REPORT DELETE FUNCTION
 #Allows the system to delete a pothhole given the reportID.
 def deletePotholeReport(reportID):
@@ -451,16 +683,25 @@ def updateReportDescription(user, potholeID, reportID, potholeDetails):
         return {"error": "Invalid pothole details specified."}, 400
 
 
-#Returns an json dump of the array of all the reports associated with a potholeID.
-def getPotholeReports(potholeID):
+#Returns an json dump of the array of a page of at most 'limit' of the reports associated with a potholeID, after the cursor. If there are more reports,
+#the cursor of the next page is also returned in the 'X-Next-Cursor' header.
+def getPotholeReports(potholeID, limit=None, cursor=None):
     #Attempts to get the pothole reports for a particular potholeID
     try:
-        #Gets all of the reports associated with a potholeID.
-        reports = db.session.query(Report).filter_by(potholeID=potholeID).all()
-        #Converts all of the found reports to their dictionary definition, and stores them in an array.
-        reportData = [r.toDict() for r in reports]
-        #Returns all of the reports in an array in json form, and an 'OK' http status codee (200).
-        return json.dumps(reportData), 200
+        limit = int(limit) if limit else REPORT_PAGE_DEFAULT_LIMIT
+        #If the limit is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if not 0 < limit <= REPORT_PAGE_MAX_LIMIT:
+            return {"error": "Invalid limit specified. The limit must be between 1 and " + str(REPORT_PAGE_MAX_LIMIT) + "."}, 400
+        #If the cursor is invalid, return an error and 'BAD REQUEST' http status code (400).
+        if not isValidReportPageCursor(cursor):
+            return {"error": "Invalid cursor specified."}, 400
+
+        #Gets the page of the reports associated with a potholeID.
+        (reports, pageHeaders) = queryReportPage([Report.potholeID == potholeID], limit, cursor)
+        #Returns the reports of the page in an array in json form, and an 'OK' http status codee (200), and the cursor of the next page if there is one.
+        if pageHeaders:
+            return encodeListingStream(reports, Report.toDict), 200, pageHeaders
+        return encodeListingStream(reports, Report.toDict), 200
     except:
     #This case only executes when an invalid datatype is used for the potholeID.
         #Rolls back the datatype in the event of misquery using invalid datatype.
@@ -490,7 +731,7 @@ def getIndividualPotholeReport(potholeID, reportID):
 def getAllPotholeReportsByUser(user):
     #Attemps to query the databse for all of the reports made by a user and returns them.
     try:
-        allReports = db.session.query(Report).filter_by(userID=user.userID).all()
+        allReports = queryReports().filter_by(userID=user.userID).all()
         allReports = [r.toDict() for r in allReports]
         return allReports
     except:
@@ -4,10 +4,26 @@
 
 #REPORTEDIMAGE CONTROLLERS - Facilitate interactions between the reportedImage model and the other models/controllers of the application.
 
-#Imports sqlalchemy errors, requests and json.
-from sqlalchemy.exc import IntegrityError
+#CONSTANTS
+#Defines the processing statuses of a reported image.
+IMAGE_STATUS_PROCESSING = "processing"
+IMAGE_STATUS_READY = "ready"
+IMAGE_STATUS_FAILED = "failed"
+#Specifies the number of images that are processed concurrently, in the background, by each worker.
+IMAGE_PROCESSING_THREADS = 2
+#Specifies the number of minutes after which an image that is still processing is considered lost, such as when its worker was restarted with the image queued.
+IMAGE_PROCESSING_TIMEOUT = 30
+#Specifies the height, in pixels, to which the reported images are resized.
+IMAGE_HEIGHT = 480
+#Specifies the number of seconds to wait for a response when determining if a URL points to an image.
+IMAGE_URL_TIMEOUT = 5
+
+#Imports requests and json.
 import json, requests
-import filetype, os, time, random, base64, tempfile, string
+import filetype, os, base64
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
 
 #Imports the all of the required models, controllers, and functions.
 from App.models import *
@@ -15,69 +31,59 @@ from App.controllers import *
 from PIL import Image, ImageOps
 from io import BytesIO
 from werkzeug.utils import secure_filename
-from pyrebase import pyrebase
-from App.firebaseConfig import config
+from App.controllers.imageStorage import getImageStorage, IMAGE_CONTENT_TYPES
 
-#Initializes the firebase object, storage object, and main directory for use in storing images.
-firebase = pyrebase.initialize_app(config)
-storage = firebase.storage()
+#Initializes the main directory for use in storing images.
 MYDIR = os.path.dirname(__file__)
 
+#Initializes the pool of background threads that process the images of reports.
+imageProcessingPool = ThreadPoolExecutor(max_workers=IMAGE_PROCESSING_THREADS, thread_name_prefix="imageProcessing")
+
+#Decodes, orients and resizes an image, and returns the image encoded as a JPEG. The image is processed entirely in memory.
+def transcodeImage(imageData):
+    #Opens the image using PIL. JPEG images are decoded at the smallest scale that is still at least the size of the resized image in
+    #both dimensions, regardless of the orientation, such that the full resolution of large photos is never decoded.
+    image = Image.open(BytesIO(imageData))
+    image.draft("RGB", (IMAGE_HEIGHT, IMAGE_HEIGHT))
+
+    #Rotates the image according to its orientation, and discards the alpha channel of the image.
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGB")
+
+    #Sets the new dimensions of the image; preserving the aspect ratio.
+    height = IMAGE_HEIGHT
+    width = int(height / image.height * image.width)
+    #Resizes the image, first reducing images that are much larger than the new dimensions by an integer factor, which is faster than resampling.
+    resizedImage = image.resize((width, height), reducing_gap=3.0)
+
+    #Encodes the image as a JPEG in memory and returns the encoded image.
+    encodedImage = BytesIO()
+    resizedImage.save(encodedImage, format="JPEG")
+    return encodedImage.getvalue()
+
 #Allows for the uploading of an image given a base64 encoded string.
 def uploadImage(base64Image, Testing=False):
-    #Attempts to process the base64 image and upload it to firebase.
+    #Attempts to process the base64 image and upload it to the image storage.
     
     try:
         #Obtains the data portion of the base64 image string.
         fileData = str(base64Image).split("base64")[1]
 
-        #Generates randomized filename for firebase
-        milliseconds = int(time.time() * 1000)
-        randomString = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-        new_filename = "REPORT " + str(milliseconds) + "_" + randomString + ".jpg"
-
-        #Creates a temporary file for use in storing the images.
-        temp = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg", dir=os.path.join(os.getcwd(), "App/uploads"))
+        #Decodes the base64 image, and resizes and compresses it in memory.
+        encodedImage = transcodeImage(base64.b64decode(fileData))
 
-
-        #Decodes the base64 image and opens it using PIL.
-        im = Image.open(BytesIO(base64.b64decode(fileData)))
-        im = ImageOps.exif_transpose(im)
-        
-        #Discards the alpha channel of the image
-        im = im.convert("RGB")
-        #Saves the image using the temporary file.
-        im.save(temp.name)
-
-        #Determines if the MIME type of the file corresponds to an image and returns an error otherwise.
-        if not filetype.is_image(temp.name):
-            return "invalid image"
-        
-        #Opens the saved image at the temporary location.
-        image = Image.open(temp.name)
-
-        #Sets the new dimensions of the image; preserving the aspect ratio.
-        height = int(480)
-        width = int(height / image.height * image.width)
-        resizedImage = image.resize((width, height))
-
-        #Compresses the image and removes transparency.
-        resizedImage = resizedImage.convert("RGB")
-
-        #Saves the image as a JPEG at the temporary location.
-        resizedImage.save(temp.name, format="JPEG")
-        print("Written to file!")
+        #Determines if the MIME type of the image corresponds to an image and returns null otherwise.
+        if not filetype.is_image(encodedImage):
+            return None
 
         #Uses the main directory if not in testing mode. Otherwise, uses the testing directory.
         cloudDirectory = "images/"
         if Testing:
             cloudDirectory = "test/"
 
-        #Stores the image at the directory in the firebase cloud storage bucket.
-        storage.child(cloudDirectory + new_filename).put(temp.name)
-
-        #Obtains a link for the newly stored image.
-        link = storage.child(cloudDirectory + new_filename).get_url(None)
+        #Stores the image at the directory in the configured image storage, and obtains a link for the newly stored image.
+        #The image storage verifies the upload, such that the link is known to lead to an image.
+        link = getImageStorage().upload(encodedImage, cloudDirectory)
 
         #Prints and returns the link to the uploaded image.
         print("Uploaded to cloud via: " + link)
@@ -87,21 +93,130 @@ def uploadImage(base64Image, Testing=False):
     #Otherwise, if the image could not be uploaded, return null.
         return null
 
-#Deletes an image from the firebase storage, if it exists.
+#Creates an image slot, marked as processing, for each of the base64 encoded images of a report, and processes the images in the background.
+#Returns the dictionary definitions of the image slots, such that the report can be returned before its images have been processed.
+def queueReportImages(reportID, base64Images, Testing=False):
+    #Creates the image slots and commits them to the database.
+    imageSlots = [ReportedImage(reportID=reportID, status=IMAGE_STATUS_PROCESSING, dateQueued=datetime.utcnow()) for base64Image in base64Images]
+    db.session.add_all(imageSlots)
+    db.session.flush()
+    imageSlotData = [imageSlot.toDict() for imageSlot in imageSlots]
+    db.session.commit()
+
+    #Processes each of the images in the background, unless the application is configured to process images synchronously (such as when testing).
+    app = current_app._get_current_object()
+    for (imageSlot, base64Image) in zip(imageSlotData, base64Images):
+        if app.config.get("IMAGE_PROCESSING_SYNCHRONOUS", app.testing):
+            processReportImage(imageSlot["imageID"], base64Image, Testing)
+        else:
+            imageProcessingPool.submit(processReportImageInContext, app, imageSlot["imageID"], base64Image, Testing)
+
+    #Returns the image slots, as they were created.
+    return imageSlotData
+
+#Processes the image of an image slot within an application context, as the background threads do not have one of their own.
+def processReportImageInContext(app, imageID, base64Image, Testing=False):
+    with app.app_context():
+        processReportImage(imageID, base64Image, Testing)
+
+#Uploads the base64 encoded image of an image slot, and marks the slot as ready with the URL of the uploaded image, or as failed.
+def processReportImage(imageID, base64Image, Testing=False):
+    #Attempts to upload the image. If the image is invalid, or cannot be uploaded, there is no URL for the image.
+    try:
+        imageURL = uploadImage(base64Image, Testing)
+    except:
+        imageURL = None
+
+    #Attempts to fill in the image slot with the outcome of the upload.
+    try:
+        #Finds the image slot. If the report has been deleted while the image was being processed, there is no slot to fill in.
+        imageSlot = db.session.query(ReportedImage).filter_by(imageID=imageID).first()
+        if not imageSlot:
+            return
+
+        #If the image was uploaded, the image is ready. Otherwise, the image could not be processed.
+        if imageURL:
+            imageSlot.imageURL = imageURL
+            imageSlot.status = IMAGE_STATUS_READY
+        else:
+            imageSlot.status = IMAGE_STATUS_FAILED
+
+        #Adds and commits the image slot to the database.
+        db.session.add(imageSlot)
+        db.session.commit()
+    except:
+    #Otherwise, rollback the changes for the database and print an appropriate error.
+        db.session.rollback()
+        print("Unable to add this image to database.")
+        markReportImageFailed(imageID)
+
+#Marks an image slot as failed in its own transaction, such that a slot whose outcome could not be stored is not left processing.
+def markReportImageFailed(imageID):
+    #Attempts to reload the image slot and mark it as failed, unless the report has been deleted.
+    try:
+        imageSlot = db.session.query(ReportedImage).filter_by(imageID=imageID).first()
+        if imageSlot:
+            imageSlot.status = IMAGE_STATUS_FAILED
+            db.session.commit()
+    except:
+    #Otherwise, rollback the changes for the database and print an appropriate error.
+        db.session.rollback()
+        print("Unable to mark this image as failed.")
+
+#Marks the image slots that have been processing for longer than IMAGE_PROCESSING_TIMEOUT as failed, and returns the number of slots that were marked.
+#The images of the slots are only held by the queue of the worker that created them, so slots whose worker was restarted can never be processed.
+def failStaleReportImages():
+    staleSlots = db.session.query(ReportedImage).filter(
+        ReportedImage.status == IMAGE_STATUS_PROCESSING,
+        ReportedImage.dateQueued < datetime.utcnow() - timedelta(minutes=IMAGE_PROCESSING_TIMEOUT)
+    ).all()
+    for imageSlot in staleSlots:
+        imageSlot.status = IMAGE_STATUS_FAILED
+    db.session.commit()
+    return len(staleSlots)
+
+#Marks the image slots that were lost by previous workers as failed when the application is created.
+def sweepStaleReportImages():
+    #Attempts to mark the lost image slots as failed.
+    try:
+        failStaleReportImages()
+    except:
+    #If the database has not been initialized, rollback the query; the slots are marked by the next worker, or via the 'failStaleImages' command.
+        db.session.rollback()
+
+#Determines whether any of the reported images matching the criteria refer to the stored image with the given link.
+def isImageURLReferenced(imageURL, *criteria):
+    return db.session.query(ReportedImage.imageID).filter(ReportedImage.imageURL == imageURL, *criteria).first() != None
+
+#Deletes the stored image with the given link from the image storage, and returns whether it was deleted.
+def deleteStoredImage(imageURL):
+    #Attempts to delete the file from the image storage, printing a success message.
+    try:
+        getImageStorage().delete(imageURL)
+        print("Successfully deleted this image!")
+        return True
+    except:
+    #Otherwise the image could not be deleted. Print an error message and return False.
+        print("Unable to delete this image!")
+        return False
+
+#Deletes an image from the image storage, if it exists.
 def deleteImageFromStorage(imageID):
-    #Attempts to delete an image from the firebase storage given an imageID, if it exists.
+    #Attempts to delete an image from the image storage given an imageID, if it exists.
     try:
         #Obtains the image link corresponding to the imageID.
         image = db.session.query(ReportedImage).filter_by(imageID = imageID).first()
 
-        #Obtains the path of the image on the firebase storage.
-        filePath = image.imageURL.split("/")[-1].split("?")[0]
-        filePath = filePath.replace("%2F", "/").replace("%20", " ")
+        #If the image has not been uploaded, there is nothing to delete from the storage.
+        if not image.imageURL:
+            return True
 
-        #Deletes the file from firebase storage, prints a success message, and returns True.
-        storage.delete(filePath, None)
-        print("Successfully deleted this image!")
-        return True
+        #Identical images are stored once, by their content, such that the stored image is only deleted once no other reported image refers to it.
+        if isImageURLReferenced(image.imageURL, ReportedImage.imageID != imageID):
+            return True
+
+        #Deletes the file from the image storage, and returns whether it was deleted.
+        return deleteStoredImage(image.imageURL)
     except:
     #Otherwise the image could not be deleted. Rollback the database, print an error message and return False.
         db.session.rollback()
@@ -112,10 +227,12 @@ def deleteImageFromStorage(imageID):
 def deleteAllReportImagesFromStorage(reportID):
     #Attempts to delete the images for a particular report given the reportID, if it exists.
     try:
-        #Gets all of the images corresponding with a reportID and deletes them.
-        images = db.session.query(ReportedImage).filter_by(reportID = reportID).all()
-        for image in images:
-            deleteImageFromStorage(image.imageID)
+        #Gets the links of all of the images corresponding with a reportID. Each stored image is deleted once, and only if no image of another report
+        #refers to it, as the images of the report may share a stored image with each other, or with other reports.
+        imageURLs = {imageURL for (imageURL,) in db.session.query(ReportedImage.imageURL).filter(ReportedImage.reportID == reportID, ReportedImage.imageURL != None)}
+        for imageURL in imageURLs:
+            if not isImageURLReferenced(imageURL, ReportedImage.reportID != reportID):
+                deleteStoredImage(imageURL)
     except:
     #Otherwise, rollback the database and print an error message.
         db.session.rollback()
@@ -136,18 +253,16 @@ def deleteAllPotholeImagesFromStorage(potholeID):
 
 #Referenced from StackOverflow
 #https://stackoverflow.com/questions/10543940/check-if-a-url-to-an-image-is-up-and-exists-in-python
-#Given a URL, determines if the URL points to an image.
+#Given a URL, determines if the URL points to an image. Images uploaded by the application are verified by the image storage instead.
 def is_url_image(image_url):
-    #Sets the expected image types.
-    image_formats = ("image/png", "image/jpeg", "image/jpg")
-    #Attempts to send a GET request to the URL.
+    #Attempts to send a HEAD request to the URL, such that only the headers of the image are transferred.
     try:
-        r = requests.get(image_url)
+        r = requests.head(image_url, allow_redirects=True, timeout=IMAGE_URL_TIMEOUT)
     #If the request fails, the URL would be invalid; return false.
     except:
         return False
     #If the content-type in the headers of the response contains a matching image format, return true.
-    if r.headers["content-type"] in image_formats:
+    if r.headers.get("content-type", "").split(";")[0].strip() in IMAGE_CONTENT_TYPES:
         return True
     #Otherwise, return false.
     return False
@@ -265,8 +380,8 @@ def addPotholeReportImage(user, potholeID, reportID, imageDetails, Testing=False
                 for base64Image in imageDetails["images"]:
 
                     imageURL = uploadImage(base64Image, Testing=Testing)
-                    #If the URL points to an image, add the image to the database.
-                    if is_url_image(imageURL):
+                    #If the image was uploaded, add the image to the database.
+                    if imageURL:
                         #Attempts to add the image to the database.
                         try:
                             #Adds the image for the report to the database using the URL and reportID.
@@ -274,12 +389,8 @@ def addPotholeReportImage(user, potholeID, reportID, imageDetails, Testing=False
                             db.session.add(reportImage)
                             db.session.commit()
                             print("Pothole image succesfully added!")
-                        #If an entry with the same URL exists, rollback the error, count the invalid entry, and print an error message.
-                        except IntegrityError:
-                            db.session.rollback()
-                            invalidCount += 1
-                            print("Pothole image already exists!")
-                        #Otherwise if an unknown error is found, count the invalid entry and print an error message.
+                        #If the image could not be added, count the invalid entry and print an error message.
+                        #Identical images share the same URL, as they are stored once, and are therefore not rejected.
                         except:
                             invalidCount += 1
                             db.session.rollback()
@@ -0,0 +1,59 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#RESPONSECACHE CONTROLLERS - Maintain a process-local cache of the compressed listings of the current data version, such that each listing is compressed once per change.
+
+#CONSTANTS
+#Specifies the maximum number of compressed listings, by request path and representation, that are kept by each worker.
+RESPONSE_CACHE_SIZE = 64
+#Specifies the gzip compression level of the cached listings.
+RESPONSE_GZIP_LEVEL = 6
+
+#Imports collections, gzip, threading and flask modules.
+import gzip, threading
+from collections import OrderedDict
+from flask import current_app, make_response, request
+
+#Defines a least recently used cache of compressed listings, holding only the listings of a single data version.
+class ResponseCache:
+    #Initializes an empty cache that does not hold the listings of any version.
+    def __init__(self, size=RESPONSE_CACHE_SIZE):
+        self.size = size
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    #Returns the (body, mimetype, listingHeaders) of the compressed listing cached under the key for the version, or None if it is not cached.
+    def get(self, version, key):
+        with self.lock:
+            if self.version != version or key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    #Caches the (body, mimetype, listingHeaders) of a compressed listing under the key for the version, discarding the listings of any other version,
+    #and the least recently used listing once the cache is full.
+    def put(self, version, key, entry):
+        with self.lock:
+            if self.version != version:
+                (self.version, self.entries) = (version, OrderedDict())
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+#Determines whether the client of the current request accepts gzip compressed responses, using its 'Accept-Encoding' header.
+def acceptsGzip():
+    return request.accept_encodings["gzip"] > 0
+
+#Returns the (body, mimetype) of the gzip compressed form of the response data returned by a controller; a string, dictionary or response.
+def compressResponseData(displayData):
+    response = make_response(displayData)
+    return gzip.compress(response.get_data(), RESPONSE_GZIP_LEVEL), response.mimetype
+
+#Returns the response cache of the current application, creating it upon first use.
+def getResponseCache():
+    if "responseCache" not in current_app.extensions:
+        current_app.extensions["responseCache"] = ResponseCache()
+    return current_app.extensions["responseCache"]
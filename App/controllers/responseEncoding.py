@@ -0,0 +1,60 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#RESPONSEENCODING CONTROLLERS - Encode the listings of the application as either JSON, or compact columnar MessagePack, as negotiated by the client.
+
+#CONSTANTS
+#Specifies the content type of the MessagePack encoding of the listings.
+MSGPACK_MIMETYPE = "application/msgpack"
+#Specifies the number of records that are serialized into each chunk of a streamed listing.
+STREAM_CHUNK_SIZE = 500
+
+#Imports json, msgpack and flask modules.
+import json, msgpack
+from flask import Response, request, has_request_context, stream_with_context
+
+#Determines whether the client of the current request prefers the MessagePack encoding of the listings, using its 'Accept' header.
+def prefersMsgpack():
+    if not has_request_context():
+        return False
+    return request.accept_mimetypes.best_match(["application/json", MSGPACK_MIMETYPE], default="application/json") == MSGPACK_MIMETYPE
+
+#Returns the columnar form of a listing; a map from each key of the dictionary definitions to the array of the values of that key, in the order of the listing.
+#The keys are stored once, rather than once for each record.
+def toColumns(records):
+    if not records:
+        return {}
+    return {key : [record[key] for record in records] for key in records[0]}
+
+#Encodes a listing of dictionary definitions for the current request. Returns the json dump of the listing, or a MessagePack response holding the columnar
+#form of the listing if the client prefers it.
+def encodeListing(records):
+    if prefersMsgpack():
+        return Response(msgpack.packb(toColumns(records)), mimetype=MSGPACK_MIMETYPE)
+    return json.dumps(records)
+
+#Generates the json form of a listing in chunks of STREAM_CHUNK_SIZE records, converting each of the rows to its dictionary definition as it is read.
+#The output is identical to the json dump of the array of the dictionary definitions.
+def generateJSONListing(rows, toDict):
+    yield "["
+    (chunk, separator) = ([], "")
+    for row in rows:
+        chunk.append(json.dumps(toDict(row)))
+        if len(chunk) == STREAM_CHUNK_SIZE:
+            yield separator + ", ".join(chunk)
+            (chunk, separator) = ([], ", ")
+    if chunk:
+        yield separator + ", ".join(chunk)
+    yield "]"
+
+#Encodes a listing of rows, where toDict converts a row to its dictionary definition, for the current request. Returns a streamed json response, which
+#serializes the rows as they are read, such that the listing is never held in memory in its entirety. The MessagePack encoding holds the columns of the
+#whole listing, and is therefore built in memory.
+#The rows are read while the response is sent, within the context of the request; outside of a request, the json dump of the listing is returned.
+def encodeListingStream(rows, toDict):
+    if not has_request_context():
+        return json.dumps([toDict(row) for row in rows])
+    if prefersMsgpack():
+        return encodeListing([toDict(row) for row in rows])
+    return Response(stream_with_context(generateJSONListing(rows, toDict)), mimetype="application/json")
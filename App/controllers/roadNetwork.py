@@ -0,0 +1,144 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#ROADNETWORK CONTROLLERS - Snap coordinates to the nearest road in-process, using road segments extracted from an OpenStreetMap export of Trinidad and Tobago.
+
+#CONSTANTS
+#Specifies the size, in degrees, of each cell in the uniform grid of road segments (approximately 110 meters).
+ROAD_GRID_CELL_SIZE = 0.001
+#Specifies the number of rings of cells around the cell of a point that are searched for the nearest road, beyond which the point is not snapped.
+ROAD_SEARCH_RINGS = 3
+#Specifies the types of OpenStreetMap ways that are roads which can be driven on.
+ROAD_HIGHWAY_TYPES = {
+    "motorway", "motorway_link", "trunk", "trunk_link", "primary", "primary_link", "secondary", "secondary_link",
+    "tertiary", "tertiary_link", "unclassified", "residential", "living_street", "service", "road"
+}
+
+#Imports array, math, sys, xml and flask modules.
+import math, sys, os, tempfile
+from array import array
+from xml.etree.ElementTree import iterparse
+from flask import current_app
+
+#Defines the road segments of a road network, stored as (latitude1, longitude1, latitude2, longitude2) in a flat array of doubles, and indexed by a
+#uniform grid where each cell holds the indexes of the segments whose bounding boxes overlap it.
+class RoadNetwork:
+    #Initializes the road network from the flat array of segment coordinates.
+    def __init__(self, segments):
+        self.segments = segments
+        self.cells = {}
+        for index in range(len(segments) // 4):
+            (latitude1, longitude1, latitude2, longitude2) = segments[index * 4 : index * 4 + 4]
+            (minRow, minColumn) = self.getCell(min(latitude1, latitude2), min(longitude1, longitude2))
+            (maxRow, maxColumn) = self.getCell(max(latitude1, latitude2), max(longitude1, longitude2))
+            for row in range(minRow, maxRow + 1):
+                for column in range(minColumn, maxColumn + 1):
+                    self.cells.setdefault((row, column), array("i")).append(index)
+
+    #Loads the road network from a segment file, written by writeRoadSegments.
+    @classmethod
+    def load(cls, segmentsFile):
+        segments = array("d")
+        with open(segmentsFile, "rb") as f:
+            segments.frombytes(f.read())
+        #The segment file is stored in little-endian byte order.
+        if sys.byteorder == "big":
+            segments.byteswap()
+        return cls(segments)
+
+    #Returns the grid cell that contains the given coordinates.
+    def getCell(self, latitude, longitude):
+        return (math.floor(latitude / ROAD_GRID_CELL_SIZE), math.floor(longitude / ROAD_GRID_CELL_SIZE))
+
+    #Returns the (latitude, longitude) of the closest point on the nearest road to the coordinates, or None if there is no road within the searched rings.
+    #Distances are measured on a local projection, where longitudes are scaled by the cosine of the latitude, which is accurate at the scale of a street.
+    def nearest(self, latitude, longitude):
+        scale = math.cos(math.radians(latitude))
+        (pointRow, pointColumn) = self.getCell(latitude, longitude)
+        segments = self.segments
+        searched = set()
+        (bestDistance, bestCoords) = (math.inf, None)
+
+        #Searches the cells in rings of increasing distance from the cell of the point.
+        for ring in range(ROAD_SEARCH_RINGS + 1):
+            for row in range(pointRow - ring, pointRow + ring + 1):
+                for column in range(pointColumn - ring, pointColumn + ring + 1):
+                    if max(abs(row - pointRow), abs(column - pointColumn)) != ring:
+                        continue
+                    for index in self.cells.get((row, column), ()):
+                        if index in searched:
+                            continue
+                        searched.add(index)
+
+                        #Projects the point onto the segment, clamping the projection to the ends of the segment.
+                        (latitude1, longitude1, latitude2, longitude2) = segments[index * 4 : index * 4 + 4]
+                        (x1, y1) = ((longitude1 - longitude) * scale, latitude1 - latitude)
+                        (dx, dy) = ((longitude2 - longitude1) * scale, latitude2 - latitude1)
+                        length = dx * dx + dy * dy
+                        t = 0 if length == 0 else min(1, max(0, -(x1 * dx + y1 * dy) / length))
+                        (x, y) = (x1 + t * dx, y1 + t * dy)
+                        distance = x * x + y * y
+                        if distance < bestDistance:
+                            (bestDistance, bestCoords) = (distance, (latitude1 + t * (latitude2 - latitude1), longitude1 + t * (longitude2 - longitude1)))
+
+            #Any segment outside of the searched rings is further than the ring from the point, so a closer road has already been found.
+            if bestCoords and math.sqrt(bestDistance) <= ring * ROAD_GRID_CELL_SIZE * scale:
+                break
+        return bestCoords
+
+    #Snaps each of the given (latitude, longitude) coordinates to the nearest road, and returns the snapped coordinates in the same order, or None for
+    #each of the coordinates without a road within the searched rings.
+    def nearestMany(self, coordinates):
+        return [self.nearest(latitude, longitude) for (latitude, longitude) in coordinates]
+
+#Writes the flat array of segment coordinates to a segment file, in little-endian byte order, replacing the file once it has been written.
+def writeRoadSegments(segments, segmentsFile):
+    if sys.byteorder == "big":
+        segments = array("d", segments)
+        segments.byteswap()
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(segmentsFile)), delete=False) as temp:
+        segments.tofile(temp)
+    os.replace(temp.name, segmentsFile)
+
+#Extracts the segments of the roads in an OpenStreetMap XML export into a segment file, and returns the number of segments written.
+def buildRoadSegments(osmFile, segmentsFile):
+    nodes = {}
+    segments = array("d")
+    wayNodes = []
+    isRoad = False
+
+    #Parses the export incrementally, clearing each element once read; the nodes of the export precede the ways that reference them.
+    #The tags of the nodes and relations are discarded, such that only the tags of a way determine whether it is a road.
+    for (event, element) in iterparse(osmFile, events=("end",)):
+        if element.tag == "node":
+            nodes[element.get("id")] = (float(element.get("lat")), float(element.get("lon")))
+            (wayNodes, isRoad) = ([], False)
+            element.clear()
+        elif element.tag == "nd":
+            wayNodes.append(element.get("ref"))
+        elif element.tag == "tag":
+            isRoad = isRoad or (element.get("k") == "highway" and element.get("v") in ROAD_HIGHWAY_TYPES)
+        elif element.tag == "way":
+            #Adds a segment between each pair of consecutive nodes of the road that are present in the export.
+            if isRoad:
+                points = [nodes[ref] for ref in wayNodes if ref in nodes]
+                for (start, end) in zip(points, points[1:]):
+                    segments.extend(start + end)
+            (wayNodes, isRoad) = ([], False)
+            element.clear()
+        elif element.tag == "relation":
+            (wayNodes, isRoad) = ([], False)
+            element.clear()
+
+    writeRoadSegments(segments, segmentsFile)
+    return len(segments) // 4
+
+#Returns the road network of the current application, loading the configured segment file upon first use, or None if no segment file is configured.
+def getRoadNetwork():
+    segmentsFile = current_app.config.get("ROAD_SEGMENTS_FILE")
+    if not segmentsFile:
+        return None
+    if "roadNetwork" not in current_app.extensions:
+        current_app.extensions["roadNetwork"] = RoadNetwork.load(segmentsFile)
+    return current_app.extensions["roadNetwork"]
@@ -0,0 +1,151 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#SNAPCACHE CONTROLLERS - Maintain a bounded cache of the coordinates that locations were snapped to, shared by all of the application workers through the database.
+
+#CONSTANTS
+#Specifies the size, in degrees, to which coordinates are quantized when looking up the cache (approximately 5.5 meters).
+SNAP_CACHE_PRECISION = 0.00005
+#Specifies the maximum number of locations in the cache, beyond which the least recently used locations are evicted.
+SNAP_CACHE_SIZE = 20000
+#Specifies the number of locations that are added to the cache between evictions, such that the cache is not counted upon every write. The cache therefore
+#holds up to SNAP_CACHE_SIZE + SNAP_CACHE_EVICTION_INTERVAL locations between evictions.
+SNAP_CACHE_EVICTION_INTERVAL = 500
+#Specifies the number of days after which a cached location is snapped again, in the event that the roads have changed.
+SNAP_CACHE_TTL = 30
+#Specifies the number of minutes between updates to the time at which a cached location was last used, limiting the writes made upon cache hits.
+SNAP_CACHE_TOUCH_INTERVAL = 60
+#Specifies the names of the counters of the hits and misses of the cache, which are stored as data versions such that they are shared by all of the workers.
+SNAP_CACHE_HITS = "snapCacheHits"
+SNAP_CACHE_MISSES = "snapCacheMisses"
+#Specifies the name of the counter of the locations that have been added to the cache, used to schedule the evictions.
+SNAP_CACHE_INSERTS = "snapCacheInserts"
+
+#Imports datetime and sqlalchemy modules.
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+
+#Imports the all of the required models and controllers.
+from App.models import *
+from App.controllers.dataVersion import getDataVersion, bumpDataVersionOnConnection
+
+#Returns the quantized coordinates that identify the location of the given coordinates in the cache.
+def getSnapCacheKey(latitude, longitude):
+    return (round(latitude / SNAP_CACHE_PRECISION), round(longitude / SNAP_CACHE_PRECISION))
+
+#Adds the given numbers of hits and misses to the counters of the cache, using the given connection of a cache transaction.
+def countSnapCacheLookups(connection, hits, misses):
+    for (name, count) in ((SNAP_CACHE_HITS, hits), (SNAP_CACHE_MISSES, misses)):
+        if count:
+            bumpDataVersionOnConnection(connection, name, count)
+
+#Returns the cached (latitude, longitude) that the location of the given coordinates was snapped to, or None if the location is not cached or has expired.
+def getCachedSnap(latitude, longitude):
+    return getCachedSnaps([(latitude, longitude)])[0]
+
+#Caches the (latitude, longitude) that the location of the given coordinates was snapped to, replacing any expired entry for the location.
+def cacheSnap(latitude, longitude, snappedCoords):
+    cacheSnaps([((latitude, longitude), snappedCoords)])
+
+#Returns the entries of the cache for the given location keys, by key, using a single query on the given connection. The query selects the entries by both
+#of the quantized coordinates, which may also match other locations, so the entries are then filtered to the given keys.
+def getSnapCacheEntries(connection, keys):
+    if not keys:
+        return {}
+    table = SnapCacheEntry.__table__
+    entries = connection.execute(select(table).where(
+        table.c.latitudeKey.in_(set(latitudeKey for (latitudeKey, longitudeKey) in keys)),
+        table.c.longitudeKey.in_(set(longitudeKey for (latitudeKey, longitudeKey) in keys))
+    )).all()
+    return {(entry.latitudeKey, entry.longitudeKey) : entry for entry in entries if (entry.latitudeKey, entry.longitudeKey) in keys}
+
+#Returns the cached (latitude, longitude) that the location of each of the given coordinates was snapped to, in the same order, or None for each location
+#that is not cached or has expired. The counters of the cache are updated with the outcome of each lookup.
+#The cache is read and updated in a separate transaction, such that a lookup never commits or rolls back the session of the request.
+def getCachedSnaps(coordinates):
+    table = SnapCacheEntry.__table__
+    keys = [getSnapCacheKey(latitude, longitude) for (latitude, longitude) in coordinates]
+    now = datetime.utcnow()
+    #Attempts to find the entries for the locations.
+    try:
+        with db.engine.begin() as connection:
+            entries = getSnapCacheEntries(connection, set(keys))
+
+            #Locations that are not cached, or have expired, are counted as misses, and the others as hits.
+            snaps = []
+            touchedEntryIDs = set()
+            for key in keys:
+                entry = entries.get(key)
+                if not entry or entry.dateCached < now - timedelta(days=SNAP_CACHE_TTL):
+                    snaps.append(None)
+                    continue
+                snaps.append((entry.latitude, entry.longitude))
+                #Occasionally records that the entry has been used, such that frequently used locations are not evicted.
+                if entry.lastUsed < now - timedelta(minutes=SNAP_CACHE_TOUCH_INTERVAL):
+                    touchedEntryIDs.add(entry.entryID)
+
+            if touchedEntryIDs:
+                connection.execute(table.update().where(table.c.entryID.in_(touchedEntryIDs)).values(lastUsed=now))
+            countSnapCacheLookups(connection, len(snaps) - snaps.count(None), snaps.count(None))
+    except:
+    #If the cache cannot be read, its transaction is rolled back, and the locations are snapped by the OSRM server without being counted.
+        snaps = [None] * len(coordinates)
+    return snaps
+
+#Caches the (latitude, longitude) that the location of each of the given ((latitude, longitude), snappedCoords) pairs was snapped to, replacing any
+#expired entries for the locations. The cache is written in a separate transaction, such that it never commits or rolls back the session of the request.
+def cacheSnaps(snaps):
+    table = SnapCacheEntry.__table__
+    #Keeps a single snap for each location, as coordinates close to each other share an entry.
+    snapsByKey = {getSnapCacheKey(latitude, longitude) : snappedCoords for ((latitude, longitude), snappedCoords) in snaps}
+    now = datetime.utcnow()
+    #Attempts to add or replace the entries for the locations.
+    try:
+        with db.engine.begin() as connection:
+            entries = getSnapCacheEntries(connection, set(snapsByKey))
+            newEntries = []
+            for ((latitudeKey, longitudeKey), (latitude, longitude)) in snapsByKey.items():
+                entry = entries.get((latitudeKey, longitudeKey))
+                if entry:
+                    connection.execute(table.update().where(table.c.entryID == entry.entryID).values(latitude=latitude, longitude=longitude, dateCached=now, lastUsed=now))
+                else:
+                    newEntries.append({"latitudeKey" : latitudeKey, "longitudeKey" : longitudeKey, "latitude" : latitude, "longitude" : longitude, "dateCached" : now, "lastUsed" : now})
+            if newEntries:
+                connection.execute(table.insert(), newEntries)
+                #Evicts the least recently used locations whenever the number of locations added by all of the workers reaches the next eviction interval.
+                bumpDataVersionOnConnection(connection, SNAP_CACHE_INSERTS, len(newEntries))
+                inserts = connection.execute(select(DataVersion.version).where(DataVersion.name == SNAP_CACHE_INSERTS)).scalar()
+                if inserts // SNAP_CACHE_EVICTION_INTERVAL != (inserts - len(newEntries)) // SNAP_CACHE_EVICTION_INTERVAL:
+                    evictSnapCache(connection)
+    except:
+    #If the locations cannot be cached, such as when another worker has cached one of them at the same time, the transaction of the cache is rolled back;
+    #the locations are snapped again upon the next miss.
+        pass
+
+#Evicts the least recently used locations from the cache, using the given connection, such that it holds at most SNAP_CACHE_SIZE locations.
+#Returns the number of locations that were evicted.
+def evictSnapCache(connection):
+    table = SnapCacheEntry.__table__
+    excess = connection.execute(select(func.count()).select_from(table)).scalar() - SNAP_CACHE_SIZE
+    if excess <= 0:
+        return 0
+    #Selects the least recently used locations, using the index on the time at which the locations were last used, and deletes them.
+    leastRecentlyUsed = select(table.c.entryID).order_by(table.c.lastUsed, table.c.entryID).limit(excess).subquery()
+    return connection.execute(table.delete().where(table.c.entryID.in_(select(leastRecentlyUsed.c.entryID)))).rowcount
+
+#Evicts the least recently used locations from the cache in a separate transaction, such that it holds at most SNAP_CACHE_SIZE locations, and returns the
+#number of locations that were evicted. Used to trim the cache outside of the evictions scheduled by the writes.
+def trimSnapCache():
+    with db.engine.begin() as connection:
+        return evictSnapCache(connection)
+
+#Returns the statistics of the snap cache; the hits and misses of all of the workers, and the number of locations cached.
+def getSnapCacheStatistics():
+    (hits, misses) = (getDataVersion(SNAP_CACHE_HITS), getDataVersion(SNAP_CACHE_MISSES))
+    return {
+        "hits" : hits,
+        "misses" : misses,
+        "hitRate" : hits / (hits + misses) if hits + misses else 0,
+        "entries" : db.session.query(SnapCacheEntry).count()
+    }
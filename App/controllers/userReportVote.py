@@ -8,8 +8,9 @@
 #Defines the minimum net vote threshold that would result in the deletion of a report.
 REPORT_DELETION_THRESHOLD = -5          
 
-#Imports json
+#Imports json and sqlalchemy functions.
 import json
+from sqlalchemy import func
 
 #Imports the all of the required models and controllers.
 from App.models import *
@@ -105,6 +106,8 @@ def voteOnPothole(user, potholeID, reportID, voteData):
                         try:
                             newVote = UserReportVote(reportID = reportID, upvote = voteData["upvote"], userID = user.userID)
                             db.session.add(newVote)
+                            #Counts the new vote for the report, in the same transaction as the vote.
+                            updateVoteCounts(reportID, voteData["upvote"], 1)
                             db.session.commit()
                         except:
                             db.session.rollback()
@@ -126,6 +129,8 @@ def voteOnPothole(user, potholeID, reportID, voteData):
                             #Deletes the vote, commits the changes, and returns a message along with a 'OK' http status code.
                             try:
                                 db.session.delete(existingVote)
+                                #Uncounts the removed vote from the report, in the same transaction as the deletion of the vote.
+                                updateVoteCounts(reportID, existingVote.upvote, -1)
                                 db.session.commit()
                                 return {"message": "Vote removed from report!"}, 200
                             except:
@@ -135,6 +140,9 @@ def voteOnPothole(user, potholeID, reportID, voteData):
                         else:
                             #Changes the vote status, adds the vote to the database, and commits the changes.
                             try:
+                                #Moves the vote from the count of the previous vote option to the count of the new vote option.
+                                updateVoteCounts(reportID, existingVote.upvote, -1)
+                                updateVoteCounts(reportID, voteData["upvote"], 1)
                                 existingVote.upvote = voteData["upvote"]
                                 db.session.add(existingVote)
                                 db.session.commit()
@@ -176,12 +184,35 @@ def calculateNetVotes(reportID):
         if(not reportID):
             return {"error": "Invalid report ID specified."}, 400
 
-        #Finds the number of upvotes and downvotes for a particular report, in the vote database.
-        upvotes = db.session.query(UserReportVote).filter_by(reportID=reportID, upvote=True).count()
-        downvotes = db.session.query(UserReportVote).filter_by(reportID=reportID, upvote=False).count()
-        #Returns the net upvotes-downvotes.
-        return (upvotes-downvotes)
+        #Finds the net upvotes-downvotes for a particular report, from the vote counts of the report.
+        netVotes = db.session.query(Report.upvoteCount - Report.downvoteCount).filter_by(reportID=reportID).scalar()
+        #Returns the net upvotes-downvotes, where a report that does not exist has no votes.
+        return netVotes if netVotes != None else 0
     except:
     #If calculating the netvotes fails, roll back the databse and returns an error. (Invalid datatype of reportID)
         db.session.rollback()
-        return {"error" : "Invalid vote report ID submitted."}, 400
\ No newline at end of file
+        return {"error" : "Invalid vote report ID submitted."}, 400
+
+#Atomically adds the amount to the upvote or downvote count of a report, depending on the vote option.
+#The update is not committed here, such that it is committed in the same transaction as the change to the vote.
+def updateVoteCounts(reportID, upvote, amount):
+    #Determines the count of the report that is changed by the vote option.
+    voteCount = Report.upvoteCount if upvote else Report.downvoteCount
+    #Increments the count in the database, so that concurrent votes on the same report are not lost.
+    db.session.query(Report).filter_by(reportID=reportID).update({voteCount : voteCount + amount}, synchronize_session=False)
+
+#Recalculates the upvote and downvote counts of all of the reports from their votes, and returns the number of reports that were updated.
+def recountReportVotes():
+    #Attempts to recalculate the vote counts of the reports.
+    try:
+        #Counts the upvotes and downvotes of each report in the database, using the index on the reportID and vote option of the votes.
+        upvotes = db.session.query(func.count(UserReportVote.voteID)).filter(UserReportVote.reportID == Report.reportID, UserReportVote.upvote == True).scalar_subquery()
+        downvotes = db.session.query(func.count(UserReportVote.voteID)).filter(UserReportVote.reportID == Report.reportID, UserReportVote.upvote == False).scalar_subquery()
+        #Updates the vote counts of all of the reports, and commits the changes.
+        updated = db.session.query(Report).update({Report.upvoteCount : upvotes, Report.downvoteCount : downvotes}, synchronize_session=False)
+        db.session.commit()
+        return updated
+    except:
+    #If recalculating the vote counts fails, rollback the database and return that no reports were updated.
+        db.session.rollback()
+        return 0
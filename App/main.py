@@ -13,6 +13,8 @@ import os
 #Imports the models and views of the application.
 from App.models import *
 from App.controllers.user import mail
+from App.controllers.potholeCache import warmPotholeCache
+from App.controllers.reportedImage import sweepStaleReportImages
 from App.views import (potholeViews, userViews, reportedImageViews, reportViews, userReportVoteViews, dashboardViews)
 views = [potholeViews, userViews, reportedImageViews, reportViews, userReportVoteViews, dashboardViews]
 
@@ -52,6 +54,13 @@ def loadConfig(app, config):
         app.config['ENV'] = os.environ.get('ENV')
         SQLITEDB = os.environ.get("SQLITEDB", default="False") 
         app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///spotDPothole.db" if SQLITEDB in ["True", "true", "TRUE"] else os.environ.get('DBURI')
+        app.config['IMAGE_STORAGE'] = os.environ.get('IMAGE_STORAGE', default="firebase")
+        app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', default="App/uploads")
+        app.config['IMAGE_STORAGE_URL'] = os.environ.get('IMAGE_STORAGE_URL', default="/api/images")
+        app.config['OSRM_URL'] = os.environ.get('OSRM_URL', default="http://osrm.justinbaldeo.com/nearest/v1/driving/")
+        app.config['OSRM_TIMEOUT'] = float(os.environ.get('OSRM_TIMEOUT', default="2"))
+        app.config['ROAD_SEGMENTS_FILE'] = os.environ.get('ROAD_SEGMENTS_FILE')
+        app.config['POTHOLE_SNAPSHOT_FILE'] = os.environ.get('POTHOLE_SNAPSHOT_FILE')
 
     
     #Used to initialize db for fixture
@@ -74,6 +83,10 @@ def create_app(config={}):
     Mail(app)
     app.app_context().push()
     jwt.init_app(app)
+    #Loads the pothole coordinates into the pothole cache of the worker.
+    warmPotholeCache()
+    #Marks the images that were still processing when a previous worker stopped as failed.
+    sweepStaleReportImages()
     return app
 
 #Allows for a user object to be returned once they have been identified within the database.
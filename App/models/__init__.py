@@ -4,3 +4,7 @@ from .report import *
 from .reportedImage import *
 from .user import *
 from .userReportVote import *
+from .dataVersion import *
+from .snapCacheEntry import *
+from .potholeChange import *
+from .potholeCluster import *
\ No newline at end of file
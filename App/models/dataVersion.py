@@ -0,0 +1,23 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#DATAVERSION MODEL - Defines the attributes for the dataVersion model, which tracks the version of datasets that are cached by the application workers.
+
+#Imports flask modules.
+from flask_sqlalchemy import SQLAlchemy
+
+#Imports the shared database to be used in defining the model without overwriting the database.
+from .sharedDB import db
+
+#Defines the dataVersion database table.
+class DataVersion(db.Model):
+    name = db.Column(db.String(64), primary_key = True)
+    version = db.Column(db.Integer, nullable = False, default = 0)
+
+    #Prints the details for a particular dataVersion record.
+    def toDict(self):
+        return {
+            "name" : self.name,
+            "version" : self.version
+        }
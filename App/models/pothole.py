@@ -14,9 +14,11 @@ from .sharedDB import db
 #Defines the pothole database table.
 class Pothole(db.Model):
     potholeID = db.Column(db.Integer, primary_key = True)
-    longitude = db.Column(db.Float, nullable = False)
-    latitude = db.Column(db.Float, nullable = False)
-    expiryDate = db.Column(db.Date, nullable = False)
+    #The coordinates are indexed so that potholes near a location can be found using range predicates, rather than scanning the table.
+    longitude = db.Column(db.Float, nullable = False, index = True)
+    latitude = db.Column(db.Float, nullable = False, index = True)
+    #The expiry date is indexed so that the expired potholes can be found without scanning the table.
+    expiryDate = db.Column(db.Date, nullable = False, index = True)
 
     #Declares a relationship with the Report table, such that all of the reports for a pothole are deleted when the pothole is deleted.
     reports = db.relationship('Report', backref=db.backref("reports", uselist=False), cascade="all, delete")
@@ -0,0 +1,33 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#POTHOLECHANGE MODEL - Defines the attributes for the potholeChange model, which logs the potholes that were created, updated or deleted, in order.
+
+#Imports flask modules and datetime.
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+
+#Imports the shared database to be used in defining the model without overwriting the database.
+from .sharedDB import db
+
+#Defines the potholeChange database table.
+class PotholeChange(db.Model):
+    #The changeIDs are never reused, even once the log has been pruned, as clients synchronize from the last changeID that they have seen.
+    __table_args__ = {"sqlite_autoincrement" : True}
+
+    changeID = db.Column(db.Integer, primary_key = True)
+    potholeID = db.Column(db.Integer, nullable = False)
+    #Whether the pothole was deleted by the change; a tombstone.
+    deleted = db.Column(db.Boolean, nullable = False, default = False)
+    #The time at which the change was made, used to prune the log.
+    dateChanged = db.Column(db.DateTime, nullable = False, default=datetime.utcnow, index = True)
+
+    #Prints the details for a particular potholeChange record.
+    def toDict(self):
+        return {
+            "changeID" : self.changeID,
+            "potholeID" : self.potholeID,
+            "deleted" : self.deleted,
+            "dateChanged" : self.dateChanged.strftime("%Y-%m-%d %H:%M:%S")
+        }
@@ -0,0 +1,35 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#POTHOLECLUSTER MODEL - Defines the attributes for the potholeCluster model, which aggregates the potholes within a cell of the map grid of a zoom level.
+
+#Imports flask modules.
+from flask_sqlalchemy import SQLAlchemy
+
+#Imports the shared database to be used in defining the model without overwriting the database.
+from .sharedDB import db
+
+#Defines the potholeCluster database table.
+class PotholeCluster(db.Model):
+    #Each cell of the grid of a zoom level has a single cluster, and the clusters of a zoom level are found by the range of their cells.
+    __table_args__ = (db.UniqueConstraint("zoom", "cellRow", "cellColumn", name="uq_pothole_cluster_cell"),)
+
+    clusterID = db.Column(db.Integer, primary_key = True)
+    zoom = db.Column(db.Integer, nullable = False)
+    cellRow = db.Column(db.Integer, nullable = False)
+    cellColumn = db.Column(db.Integer, nullable = False)
+    #The number of potholes and reports in the cell, and the sums of the coordinates of the potholes, from which the centroid is calculated.
+    potholeCount = db.Column(db.Integer, nullable = False, default = 0)
+    reportCount = db.Column(db.Integer, nullable = False, default = 0)
+    latitudeSum = db.Column(db.Float, nullable = False, default = 0)
+    longitudeSum = db.Column(db.Float, nullable = False, default = 0)
+
+    #Prints the details for a particular potholeCluster record.
+    def toDict(self):
+        return {
+            "latitude" : self.latitudeSum / self.potholeCount,
+            "longitude" : self.longitudeSum / self.potholeCount,
+            "numPotholes" : self.potholeCount,
+            "numReports" : self.reportCount
+        }
@@ -14,14 +14,22 @@ from .sharedDB import db
 
 #Defines the report database table.
 class Report(db.Model):
+    #Indexes the reports by user and pothole, so that checking whether a user has already reported a pothole does not scan the table.
+    #The reports are also indexed by (dateReported, reportID), the keys by which the report listings are ordered and paged.
+    __table_args__ = (db.Index("ix_report_userID_potholeID", "userID", "potholeID"), db.Index("ix_report_dateReported_reportID", "dateReported", "reportID"))
+
     reportID = db.Column(db.Integer, primary_key = True)
     description = db.Column(db.String(500), nullable = False)
     dateReported = db.Column(db.Date, nullable = False, default=datetime.utcnow)
+    #Counts the upvotes and downvotes of the report. These are updated in the same transaction as the votes, such that the net votes of a
+    #report can be determined without counting its votes.
+    upvoteCount = db.Column(db.Integer, nullable = False, default = 0, server_default = "0")
+    downvoteCount = db.Column(db.Integer, nullable = False, default = 0, server_default = "0")
 
-    #Foreign key that references the user table.
-    userID = db.Column(db.Integer, db.ForeignKey("user.userID"), nullable = False)
-    #Foreign key that references the pothole table.
-    potholeID = db.Column(db.Integer, db.ForeignKey("pothole.potholeID"), nullable=False)
+    #Foreign key that references the user table. It is indexed so that the reports of a user can be found without scanning the table.
+    userID = db.Column(db.Integer, db.ForeignKey("user.userID"), nullable = False, index = True)
+    #Foreign key that references the pothole table. It is indexed so that the reports of a pothole can be found without scanning the table.
+    potholeID = db.Column(db.Integer, db.ForeignKey("pothole.potholeID"), nullable=False, index = True)
 
     #Declares a relationship with the Vote table, such that all of the votes for a report are deleted when the report is deleted.
     votes = db.relationship('UserReportVote', cascade="all, delete", backref='report')
@@ -37,6 +45,8 @@ class Report(db.Model):
             "dateReported" : self.dateReported.strftime("%Y-%m-%d"),
             "description" : bleach.clean(self.description),
             "votes" : [vote.toDict() for vote in self.votes],
+            "upvoteCount" : self.upvoteCount,
+            "downvoteCount" : self.downvoteCount,
             "reportedImages" : [rImage.toDict() for rImage in self.reportedImages],
             "reportedBy" : bleach.clean(self.user.firstName + " " + self.user.lastName)
         }
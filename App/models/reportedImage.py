@@ -12,11 +12,19 @@ from .sharedDB import db
 
 #Defines the reportedImage database table.
 class ReportedImage(db.Model):
+    #Indexes the images by their status and the time at which they were queued, used to find the images whose processing was interrupted.
+    __table_args__ = (db.Index("ix_reported_image_status_dateQueued", "status", "dateQueued"),)
+
     imageID = db.Column(db.Integer, primary_key = True)
-    imageURL = db.Column(db.String(200), nullable = False, unique=True)
+    #The URL of the image is only known once the image has been processed and uploaded.
+    imageURL = db.Column(db.String(200), nullable = True)
+    #The processing status of the image, which is either 'processing', 'ready' or 'failed'.
+    status = db.Column(db.String(16), nullable = False, default = "ready", server_default = "ready")
+    #The time at which the image was queued for processing, which is not known for the images added before images were processed in the background.
+    dateQueued = db.Column(db.DateTime, nullable = True)
 
-    #Foreign key that references the report table.
-    reportID = db.Column(db.Integer, db.ForeignKey("report.reportID"), nullable=False)
+    #Foreign key that references the report table. It is indexed so that the images of a report can be found without scanning the table.
+    reportID = db.Column(db.Integer, db.ForeignKey("report.reportID"), nullable=False, index = True)
 
     #Prints the details for a particular reportedImage record.
     def toDict(self):
@@ -24,4 +32,5 @@ class ReportedImage(db.Model):
             "imageID" : self.imageID,
             "reportID" : self.reportID,
             "imageURL" : self.imageURL,
+            "status" : self.status,
         }
\ No newline at end of file
@@ -0,0 +1,37 @@
+#Justin Baldeosingh
+#SpotDPothole-Backend
+#NULLIFY
+
+#SNAPCACHEENTRY MODEL - Defines the attributes for the snapCacheEntry model, which caches the coordinates that locations were snapped to by the OSRM server.
+
+#Imports flask modules and datetime.
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+
+#Imports the shared database to be used in defining the model without overwriting the database.
+from .sharedDB import db
+
+#Defines the snapCacheEntry database table.
+class SnapCacheEntry(db.Model):
+    #Each location is identified by its quantized coordinates, such that there is a single entry for the locations within a few meters of each other.
+    __table_args__ = (db.UniqueConstraint("latitudeKey", "longitudeKey", name="uq_snap_cache_entry_location"),)
+
+    entryID = db.Column(db.Integer, primary_key = True)
+    latitudeKey = db.Column(db.Integer, nullable = False)
+    longitudeKey = db.Column(db.Integer, nullable = False)
+    #The coordinates that the location was snapped to.
+    latitude = db.Column(db.Float, nullable = False)
+    longitude = db.Column(db.Float, nullable = False)
+    #The time at which the location was snapped, used to expire the entry, and the time at which the entry was last used, used to evict the least recently used entries.
+    dateCached = db.Column(db.DateTime, nullable = False, default=datetime.utcnow)
+    lastUsed = db.Column(db.DateTime, nullable = False, default=datetime.utcnow, index = True)
+
+    #Prints the details for a particular snapCacheEntry record.
+    def toDict(self):
+        return {
+            "entryID" : self.entryID,
+            "latitude" : self.latitude,
+            "longitude" : self.longitude,
+            "dateCached" : self.dateCached.strftime("%Y-%m-%d %H:%M:%S"),
+            "lastUsed" : self.lastUsed.strftime("%Y-%m-%d %H:%M:%S")
+        }
@@ -13,6 +13,13 @@ from .sharedDB import db
 
 #Defines the UserReportVote database table.
 class UserReportVote(db.Model):
+    #Indexes the votes by the user and report, used to find the vote of a user on a report, and by the report and direction of the vote,
+    #used to count the upvotes and downvotes of a report.
+    __table_args__ = (
+        db.Index("ix_user_report_vote_userID_reportID", "userID", "reportID"),
+        db.Index("ix_user_report_vote_reportID_upvote", "reportID", "upvote"),
+    )
+
     voteID = db.Column(db.Integer, primary_key = True)
     upvote = db.Column(db.Boolean, nullable = False)
 
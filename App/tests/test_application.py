@@ -1,8 +1,16 @@
-import os, tempfile, pytest, logging
+import os, tempfile, pytest, logging, gzip
 from App.controllers.pothole import getAllPotholes
 from App.controllers.user import getOneRegisteredUser, banUserController, unbanUserController
 from App.main import create_app, init_db
-import time
+import time, threading, base64, requests, msgpack, subprocess, sys
+from importlib import import_module
+from datetime import datetime, timedelta
+from flask import current_app
+from io import BytesIO
+from PIL import Image
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from sqlalchemy import event, text, tuple_
+from sqlalchemy.engine import Engine
 
 from App.controllers import *
 from App.views import *
@@ -12,12 +20,50 @@ from App.models import *
 
 LOGGER = logging.getLogger(__name__)
 
+#Returns the number of SQL statements executed by the database when calling a function.
+def countStatements(function):
+    statements = []
+    def recordStatement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", recordStatement)
+    try:
+        function()
+    finally:
+        event.remove(Engine, "before_cursor_execute", recordStatement)
+    return len(statements)
+
+#Starts a HTTP server on a free local port, which handles each request in a separate background thread using the given handler, and returns the server.
+def startHTTPServer(handlerClass):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handlerClass)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+#Returns the query plan chosen by the SQLite database for the given query.
+def explainQueryPlan(query):
+    statement = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    return "\n".join(row[-1] for row in db.session.execute(text("EXPLAIN QUERY PLAN " + statement)))
+
+#Creates a pothole with a report, an image and a vote for each of the given users, and returns the pothole.
+def createReportedPothole(users, latitude, longitude):
+    pothole = Pothole(latitude=latitude, longitude=longitude, expiryDate=datetime.now() + timedelta(days=60))
+    db.session.add(pothole)
+    db.session.flush()
+    for user in users:
+        report = Report(userID=user.userID, potholeID=pothole.potholeID, description="Pothole created for testing.", upvoteCount=1)
+        db.session.add(report)
+        db.session.flush()
+        db.session.add(ReportedImage(reportID=report.reportID, imageURL="https://example.com/" + str(report.reportID) + ".jpg"))
+        db.session.add(UserReportVote(reportID=report.reportID, userID=user.userID, upvote=True))
+    db.session.commit()
+    return pothole
+
 # fixtures are used to setup state in the app before the test
 @pytest.fixture
 def empty_db():
     app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': 'sqlite:///test.db'})
     init_db(app)
     yield app.test_client()
+    db.session.remove()
     os.unlink(os.getcwd()+'/App/test.db')
 
 # This fixture depends on create_users which is tested in test #5 test_create_user
@@ -28,6 +74,7 @@ def users_in_db():
     init_db(app)
     createTestUsers()
     yield app.test_client()
+    db.session.remove()
     os.unlink(os.getcwd()+'/App/test.db')
     
 
@@ -37,6 +84,7 @@ def simulated_db():
     init_db(app)
     createSimulatedData()
     yield app.test_client()
+    db.session.remove()
     os.unlink(os.getcwd()+'/App/test.db')
 
 ########## Unit Tests ########## 
@@ -156,6 +204,19 @@ def testConfirmationTokenInvalid(simulated_db):
     returned_email = confirm_token(token)
     assert returned_email == False
 
+# Unit Test 22: transcodeImage should orient and resize a large photo to a JPEG image that is 480 pixels high, without writing any files.
+def testTranscodeImageInMemory(empty_db):
+    photo = Image.new("RGB", (4032, 3024), (90, 90, 90))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    photoData = BytesIO()
+    photo.save(photoData, format="JPEG", exif=exif)
+    uploadedFiles = os.listdir("App/uploads")
+
+    transcodedImage = Image.open(BytesIO(transcodeImage(photoData.getvalue())))
+
+    assert transcodedImage.format == "JPEG" and transcodedImage.size == (360, 480) and os.listdir("App/uploads") == uploadedFiles
+
 
 ########## Integration Tests ##########  
 #Integration Test 1: registerUserController should create a user account using valid data.
@@ -1081,4 +1142,950 @@ def testResetPasswordControllerMismatchedPassword(users_in_db):
     token = generate_confirmation_token(email)
     rv = resetPasswordController(details, token)
 
-    assert 'Passwords do not match!' in rv[0]["error"] and rv[1] == 400 
\ No newline at end of file
+    assert 'Passwords do not match!' in rv[0]["error"] and rv[1] == 400
+
+
+
+# Integration Test 64: findClosestPothole should return the nearest pothole within the distance threshold, ignoring the potholes outside of it.
+def testFindClosestPotholeWithinThreshold(empty_db):
+    expiryDate = datetime.now() + timedelta(days=60)
+    nearPothole = Pothole(latitude=10.650000, longitude=-61.450000, expiryDate=expiryDate)
+    nearestPothole = Pothole(latitude=10.650030, longitude=-61.450000, expiryDate=expiryDate)
+    farPothole = Pothole(latitude=10.660000, longitude=-61.450000, expiryDate=expiryDate)
+    db.session.add_all([nearPothole, nearestPothole, farPothole])
+    db.session.commit()
+
+    closestPothole = findClosestPothole(10.650040, -61.450000)
+
+    assert closestPothole.potholeID == nearestPothole.potholeID
+
+# Integration Test 65: findClosestPothole should return None when there are no potholes within the distance threshold.
+def testFindClosestPotholeOutsideThreshold(empty_db):
+    expiryDate = datetime.now() + timedelta(days=60)
+    db.session.add(Pothole(latitude=10.650000, longitude=-61.450000, expiryDate=expiryDate))
+    db.session.commit()
+
+    closestPothole = findClosestPothole(10.650200, -61.450000)
+
+    assert closestPothole == None
+
+# Integration Test 66: The pothole cache should be updated, without being reloaded, when a pothole is created or deleted by the worker.
+def testPotholeCacheIncrementalUpdates(users_in_db):
+    reportDetails = {
+        "longitude" : -61.277001,
+        "latitude" : 10.726551,
+        "constituencyID" : "arima"
+    }
+
+    user1 = getOneRegisteredUser("tester1@yahoo.com")
+    reportPotholeDriver(user1, reportDetails)
+    potholeID = getAllPotholes()[0]["potholeID"]
+    cache = getPotholeCache()
+    cachedAfterCreate = potholeID in cache.coordinates and cache.version == getDataVersion(POTHOLE_CACHE_VERSION)
+
+    deletePothole(potholeID)
+    cachedAfterDelete = potholeID in cache.coordinates
+
+    assert cachedAfterCreate and not cachedAfterDelete and cache.version == getDataVersion(POTHOLE_CACHE_VERSION)
+
+# Integration Test 67: The pothole cache should be refreshed when the potholes are changed by another worker.
+def testPotholeCacheRefreshOnVersionChange(empty_db):
+    findClosestPothole(10.650000, -61.450000)
+
+    #Simulates another worker adding a pothole, without updating the cache of this worker.
+    pothole = Pothole(latitude=10.650000, longitude=-61.450000, expiryDate=datetime.now() + timedelta(days=60))
+    db.session.add(pothole)
+    bumpDataVersion(POTHOLE_CACHE_VERSION)
+    db.session.commit()
+
+    closestPothole = findClosestPothole(10.650010, -61.450000)
+
+    assert closestPothole.potholeID == pothole.potholeID
+
+# Integration Test 68: reportPotholeDriverBatch should deduplicate points of the same pothole, reject points outside of Trinidad and Tobago, and report the remaining points.
+def testDriverReportBatch(users_in_db):
+    batchDetails = {
+        "points" : [
+            {"longitude" : -61.277001, "latitude" : 10.726551},
+            {"longitude" : -61.277001, "latitude" : 10.726581},
+            {"longitude" : -61.452443, "latitude" : 10.650744},
+            {"longitude" : -62.500000, "latitude" : 10.650744}
+        ]
+    }
+
+    user1 = getOneRegisteredUser("tester1@yahoo.com")
+    rv = reportPotholeDriverBatch(user1, batchDetails)
+
+    assert rv[1] == 201 and rv[0]["reported"] == 2 and rv[0]["rejected"] == 1 and len(getAllPotholes()) == 2 and len(getAllPotholeReportsByUser(user1)) == 2
+
+# Integration Test 69: reportPotholeDriverBatch should match points to existing potholes, and reset the expiry of potholes already reported by the user.
+def testDriverReportBatchExistingPotholes(users_in_db):
+    batchDetails = {
+        "points" : [
+            {"longitude" : -61.277001, "latitude" : 10.726551},
+            {"longitude" : -61.452443, "latitude" : 10.650744}
+        ]
+    }
+
+    user1 = getOneRegisteredUser("tester1@yahoo.com")
+    user2 = getOneRegisteredUser("tester2@yahoo.com")
+    reportPotholeDriverBatch(user1, batchDetails)
+    rvSameUser = reportPotholeDriverBatch(user1, batchDetails)
+    rvOtherUser = reportPotholeDriverBatch(user2, batchDetails)
+
+    assert rvSameUser[0]["refreshed"] == 2 and rvOtherUser[0]["reported"] == 2 and len(getAllPotholes()) == 2 and len(getAllPotholeReportsByUser(user2)) == 2
+
+# Integration Test 70: getReportData should execute the same number of SQL statements regardless of the number of reports.
+def testGetReportDataConstantStatements(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 7)]
+    createReportedPothole(users[:2], 10.650000, -61.450000)
+    fewReportsStatements = countStatements(getReportData)
+
+    for i in range(5):
+        createReportedPothole(users, 10.660000 + i / 100, -61.450000)
+    manyReportsStatements = countStatements(getReportData)
+
+    assert fewReportsStatements == manyReportsStatements and json.loads(getReportData()[0])[-1]["reportedBy"] == "Terrence Williams"
+
+# Integration Test 71: getPotholeData should return the number of reports of each pothole using a single SQL statement, matching the pothole definitions.
+def testGetPotholeDataSingleStatement(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 7)]
+    for i in range(5):
+        createReportedPothole(users[:i], 10.660000 + i / 100, -61.450000)
+    db.session.remove()
+
+    statements = countStatements(getPotholeData)
+    potholeData = json.loads(getPotholeData()[0])
+
+    assert statements == 1 and potholeData == getAllPotholes() and [p["numReports"] for p in potholeData] == [0, 1, 2, 3, 4]
+
+# Integration Test 72: getUserPotholeData should return each of the user's potholes once, using a single SQL statement regardless of the potholes of other users.
+def testGetUserPotholeDataSingleStatement(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 7)]
+    userPothole = createReportedPothole(users[:3], 10.650000, -61.450000)
+    db.session.add(Report(userID=users[0].userID, potholeID=userPothole.potholeID, description="Second report of the same pothole."))
+    db.session.commit()
+    createReportedPothole(users[1:3], 10.660000, -61.450000)
+    userPotholeID = userPothole.potholeID
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    fewPotholesStatements = countStatements(lambda: getUserPotholeData(user))
+
+    for i in range(5):
+        createReportedPothole(users[1:], 10.670000 + i / 100, -61.450000)
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    manyPotholesStatements = countStatements(lambda: getUserPotholeData(user))
+    potholeData = json.loads(getUserPotholeData(user)[0])
+
+    assert fewPotholesStatements == manyPotholesStatements == 1 and [(p["potholeID"], p["numReports"]) for p in potholeData] == [(userPotholeID, 4)]
+
+# Integration Test 73: The frequent lookups of reports, votes, images and expired potholes should be served by the indexes on the lookup columns.
+def testLookupQueriesUseIndexes(users_in_db):
+    lookups = [
+        (db.session.query(Report).filter_by(userID=1), "ix_report_userID"),
+        (db.session.query(Report).filter_by(potholeID=1), "ix_report_potholeID"),
+        (db.session.query(Report).filter_by(userID=1, potholeID=1), "ix_report_userID_potholeID"),
+        (db.session.query(UserReportVote).filter_by(userID=1, reportID=1), "ix_user_report_vote_userID_reportID"),
+        (db.session.query(UserReportVote).filter_by(reportID=1, upvote=True), "ix_user_report_vote_reportID_upvote"),
+        (db.session.query(ReportedImage).filter_by(reportID=1), "ix_reported_image_reportID"),
+        (db.session.query(Pothole).filter(datetime.now() >= Pothole.expiryDate), "ix_pothole_expiryDate")
+    ]
+
+    plans = [explainQueryPlan(query) for (query, index) in lookups]
+
+    assert all(("USING INDEX " + index + " " in plan or "USING COVERING INDEX " + index + " " in plan) for (plan, (query, index)) in zip(plans, lookups))
+
+# Integration Test 74: voteOnPothole should keep the vote counts of a report equal to its votes, and calculateNetVotes should read them using a single SQL statement.
+def testVoteOnPotholeUpdatesVoteCounts(simulated_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 5)]
+    potholeID = 1
+    reportID = 1
+
+    voteOnPothole(users[0], potholeID, reportID, {"upvote" : True})
+    voteOnPothole(users[1], potholeID, reportID, {"upvote" : True})
+    voteOnPothole(users[2], potholeID, reportID, {"upvote" : False})
+    voteOnPothole(users[3], potholeID, reportID, {"upvote" : True})
+    voteOnPothole(users[3], potholeID, reportID, {"upvote" : True})
+    voteOnPothole(users[1], potholeID, reportID, {"upvote" : False})
+
+    report = db.session.query(Report).filter_by(reportID=reportID).first()
+    upvotes = db.session.query(UserReportVote).filter_by(reportID=reportID, upvote=True).count()
+    downvotes = db.session.query(UserReportVote).filter_by(reportID=reportID, upvote=False).count()
+    statements = countStatements(lambda: calculateNetVotes(reportID))
+
+    assert (report.upvoteCount, report.downvoteCount) == (upvotes, downvotes) == (1, 2) and calculateNetVotes(reportID) == -1 and statements == 1
+
+# Integration Test 75: recountReportVotes should rebuild the vote counts of the reports from their votes.
+def testRecountReportVotes(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 4)]
+    pothole = createReportedPothole(users, 10.650000, -61.450000)
+    report = pothole.reports[0]
+    db.session.add(UserReportVote(reportID=report.reportID, userID=users[1].userID, upvote=False))
+    db.session.query(Report).update({Report.upvoteCount : 0, Report.downvoteCount : 0}, synchronize_session=False)
+    db.session.commit()
+
+    updated = recountReportVotes()
+    voteCounts = [(r.upvoteCount, r.downvoteCount) for r in db.session.query(Report).order_by(Report.reportID).all()]
+
+    assert updated == 3 and voteCounts == [(1, 1), (1, 0), (1, 0)]
+
+# Integration Test 76: reportPotholeStandard should return a slot for each image, marked as processing, which is filled in once the image has been processed.
+def testReportPotholeStandardImageSlots(users_in_db, monkeypatch):
+    uploadedImages = iter(["https://example.com/first.jpg", None])
+    monkeypatch.setattr(import_module("App.controllers.reportedImage"), "uploadImage", lambda base64Image, Testing=False: next(uploadedImages))
+    reportDetails = {
+        "longitude" : -61.277001,
+        "latitude" : 10.726551,
+        "description": "Very large pothole spanning both lanes of the road.",
+        "images" : ["data:image/jpeg;base64,first", "data:image/jpeg;base64,second"]
+    }
+
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    response, statusCode = reportPotholeStandard(user, reportDetails, Testing=True)
+    images = [(image.imageURL, image.status) for image in db.session.query(ReportedImage).order_by(ReportedImage.imageID).all()]
+
+    assert statusCode == 201 and [image["status"] for image in response["images"]] == ["processing", "processing"] and images == [("https://example.com/first.jpg", "ready"), (None, "failed")]
+
+# Integration Test 77: reportPotholeStandard should return before its images are processed, when the images are processed in the background.
+def testReportPotholeStandardProcessesImagesInBackground(users_in_db, monkeypatch):
+    imageUploaded = threading.Event()
+    monkeypatch.setattr(import_module("App.controllers.reportedImage"), "uploadImage", lambda base64Image, Testing=False: imageUploaded.wait(5) and "https://example.com/background.jpg")
+    monkeypatch.setitem(current_app.config, "IMAGE_PROCESSING_SYNCHRONOUS", False)
+    reportDetails = {
+        "longitude" : -61.277001,
+        "latitude" : 10.726551,
+        "description": "Very large pothole spanning both lanes of the road.",
+        "images" : ["data:image/jpeg;base64,background"]
+    }
+
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    response, statusCode = reportPotholeStandard(user, reportDetails, Testing=True)
+    imageID = response["images"][0]["imageID"]
+    statusBefore = db.session.query(ReportedImage.status).filter_by(imageID=imageID).scalar()
+
+    imageUploaded.set()
+    for attempt in range(50):
+        db.session.rollback()
+        if db.session.query(ReportedImage.status).filter_by(imageID=imageID).scalar() != "processing":
+            break
+        time.sleep(0.1)
+    image = db.session.query(ReportedImage).filter_by(imageID=imageID).first()
+
+    assert statusCode == 201 and statusBefore == "processing" and (image.imageURL, image.status) == ("https://example.com/background.jpg", "ready")
+
+# Integration Test 78: The local image storage should store identical images once, and serve them as immutable files that support conditional requests.
+def testLocalImageStorageServesImages(empty_db, monkeypatch, tmp_path):
+    monkeypatch.setitem(current_app.config, "IMAGE_STORAGE", "local")
+    monkeypatch.setitem(current_app.config, "UPLOAD_FOLDER", str(tmp_path))
+    current_app.extensions.pop("imageStorage", None)
+    imageData = BytesIO()
+    Image.new("RGB", (64, 48), (90, 90, 90)).save(imageData, format="JPEG")
+
+    imageURL = getImageStorage().upload(imageData.getvalue(), "test/")
+    duplicateURL = getImageStorage().upload(imageData.getvalue(), "test/")
+    response = empty_db.get(imageURL)
+    conditionalResponse = empty_db.get(imageURL, headers={"If-None-Match" : response.headers["ETag"]})
+    getImageStorage().delete(imageURL)
+    deletedResponse = empty_db.get(imageURL)
+
+    assert imageURL == duplicateURL and imageURL.startswith("/api/images/test/") and response.status_code == 200 and response.data == imageData.getvalue()
+    assert "immutable" in response.headers["Cache-Control"] and conditionalResponse.status_code == 304 and deletedResponse.status_code == 404
+
+# Integration Test 79: uploadImage and deleteImageFromStorage should store and delete images using the configured image storage.
+def testUploadImageToLocalImageStorage(simulated_db, monkeypatch, tmp_path):
+    monkeypatch.setitem(current_app.config, "IMAGE_STORAGE", "local")
+    monkeypatch.setitem(current_app.config, "UPLOAD_FOLDER", str(tmp_path))
+    current_app.extensions.pop("imageStorage", None)
+    imageData = BytesIO()
+    Image.new("RGB", (640, 480), (90, 90, 90)).save(imageData, format="PNG")
+
+    imageURL = uploadImage("data:image/png;base64," + base64.b64encode(imageData.getvalue()).decode(), Testing=True)
+    imagePath = getImageStorage().getPath(imageURL[len("/api/images/"):])
+    storedImage = Image.open(imagePath)
+    reportImage = ReportedImage(reportID=1, imageURL=imageURL)
+    db.session.add(reportImage)
+    db.session.commit()
+    deleted = deleteImageFromStorage(reportImage.imageID)
+
+    assert storedImage.format == "JPEG" and storedImage.size == (640, 480) and deleted and not os.path.exists(imagePath)
+
+#Simulates the firebase storage, responding to uploads with the metadata of the stored object.
+class FakeFirebaseStorage:
+    def __init__(self, contentType):
+        self.contentType = contentType
+        self.path = None
+
+    def child(self, path):
+        self.path = path
+        return self
+
+    def put(self, file):
+        return {"name" : self.path, "contentType" : self.contentType, "size" : str(len(file.read()))}
+
+    def get_url(self, token):
+        return "https://firebasestorage.googleapis.com/v0/b/spotdpoth.appspot.com/o/" + self.path.replace("/", "%2F") + "?alt=media"
+
+# Integration Test 80: uploadImage should verify the upload using the metadata returned by the firebase storage, without downloading the uploaded image.
+def testUploadImageVerifiedByStorageMetadata(empty_db, monkeypatch):
+    downloads = []
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: downloads.append(args))
+    monkeypatch.setattr(requests, "head", lambda *args, **kwargs: downloads.append(args))
+    imageData = BytesIO()
+    Image.new("RGB", (640, 480), (90, 90, 90)).save(imageData, format="PNG")
+    base64Image = "data:image/png;base64," + base64.b64encode(imageData.getvalue()).decode()
+
+    current_app.extensions["imageStorage"] = FirebaseImageStorage()
+    current_app.extensions["imageStorage"].storage = FakeFirebaseStorage("image/jpeg")
+    imageURL = uploadImage(base64Image, Testing=True)
+    current_app.extensions["imageStorage"].storage = FakeFirebaseStorage("text/html")
+    with pytest.raises(Exception):
+        current_app.extensions["imageStorage"].upload(imageData.getvalue(), "test/")
+
+    assert imageURL.startswith("https://firebasestorage.googleapis.com/v0/b/spotdpoth.appspot.com/o/test%2FREPORT") and downloads == []
+
+#Simulates a server hosting an image, recording the methods of the requests made for the image.
+class ImageRequestHandler(BaseHTTPRequestHandler):
+    methods = []
+
+    def do_HEAD(self):
+        self.methods.append("HEAD")
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg; charset=binary")
+        self.send_header("Content-Length", "4")
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.methods[-1] = "GET"
+        self.wfile.write(b"jpeg")
+
+    def log_message(self, format, *args):
+        pass
+
+# Integration Test 81: is_url_image should determine if a URL points to an image using a HEAD request, without downloading the image.
+def testIsURLImageUsesHeadRequest(empty_db):
+    server = startHTTPServer(ImageRequestHandler)
+    try:
+        isImage = is_url_image("http://127.0.0.1:" + str(server.server_port) + "/image.jpg")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert isImage and ImageRequestHandler.methods == ["HEAD"]
+
+# Integration Test 82: snapCoordsToStreet should snap nearby coordinates using the OSRM server once, and snap expired locations again.
+def testSnapCoordsToStreetUsesCache(empty_db, monkeypatch):
+    reportController = import_module("App.controllers.report")
+    osrmRequests = []
+    monkeypatch.setattr(reportController, "requestSnappedCoords", lambda latitude, longitude: osrmRequests.append((latitude, longitude)) or (10.6401, -61.3991))
+
+    firstCoords = snapCoordsToStreet(10.64, -61.399)
+    secondCoords = snapCoordsToStreet(10.640001, -61.399001)
+    statistics = getSnapCacheStatistics()
+
+    db.session.query(SnapCacheEntry).update({"dateCached" : datetime.utcnow() - timedelta(days=31)})
+    db.session.commit()
+    snapCoordsToStreet(10.64, -61.399)
+
+    assert firstCoords == secondCoords == (10.6401, -61.3991) and len(osrmRequests) == 2
+    assert statistics["hits"] == 1 and statistics["misses"] == 1 and statistics["entries"] == 1
+
+# Integration Test 83: cacheSnap should evict the least recently used locations when the snap cache exceeds its size.
+def testSnapCacheEvictsLeastRecentlyUsed(empty_db, monkeypatch):
+    monkeypatch.setattr(import_module("App.controllers.snapCache"), "SNAP_CACHE_SIZE", 2)
+    monkeypatch.setattr(import_module("App.controllers.snapCache"), "SNAP_CACHE_EVICTION_INTERVAL", 1)
+
+    cacheSnap(10.1, -61.1, (10.1, -61.1))
+    cacheSnap(10.2, -61.2, (10.2, -61.2))
+    db.session.query(SnapCacheEntry).update({"lastUsed" : datetime.utcnow() - timedelta(days=1)})
+    db.session.commit()
+    getCachedSnap(10.1, -61.1)
+    cacheSnap(10.3, -61.3, (10.3, -61.3))
+
+    assert getCachedSnap(10.1, -61.1) and getCachedSnap(10.3, -61.3) and not getCachedSnap(10.2, -61.2)
+
+#Simulates an OSRM server, responding to nearest requests after a delay and with a status code that can be changed by the tests.
+class OSRMRequestHandler(BaseHTTPRequestHandler):
+    delay = 0
+    status = 200
+    paths = []
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        time.sleep(self.delay)
+        body = json.dumps({"code" : "Ok", "waypoints" : [{"location" : [-61.3991, 10.6401]}]}).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Integration Test 84: snapCoordsToStreet should snap coordinates using the configured OSRM server, and give up on the server once the timeout has passed.
+def testSnapCoordsToStreetTimeout(empty_db, monkeypatch):
+    monkeypatch.setattr(OSRMRequestHandler, "paths", [])
+    server = startHTTPServer(OSRMRequestHandler)
+    current_app.extensions["osrmClient"] = OSRMClient("http://127.0.0.1:" + str(server.server_port) + "/nearest/v1/driving", 0.2)
+    try:
+        snappedCoords = snapCoordsToStreet(10.64, -61.399)
+        monkeypatch.setattr(OSRMRequestHandler, "delay", 1)
+        startTime = time.monotonic()
+        with pytest.raises(Exception):
+            snapCoordsToStreet(10.65, -61.41)
+        elapsed = time.monotonic() - startTime
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert snappedCoords == (10.6401, -61.3991) and OSRMRequestHandler.paths[0] == "/nearest/v1/driving/-61.399,10.64"
+    assert elapsed < 0.8
+
+# Integration Test 85: the OSRM client should stop contacting the server after repeated failures, and resume once a background probe succeeds.
+def testOSRMCircuitBreaker(empty_db, monkeypatch):
+    monkeypatch.setattr(OSRMRequestHandler, "paths", [])
+    monkeypatch.setattr(OSRMRequestHandler, "status", 500)
+    server = startHTTPServer(OSRMRequestHandler)
+    client = OSRMClient("http://127.0.0.1:" + str(server.server_port) + "/nearest/v1/driving/", 1, failureThreshold=2, probeInterval=0.05)
+    try:
+        for i in range(2):
+            with pytest.raises(Exception):
+                client.nearest(10.64, -61.399)
+        with pytest.raises(OSRMUnavailable):
+            client.nearest(10.64, -61.399)
+        reportRequests = OSRMRequestHandler.paths.count("/nearest/v1/driving/-61.399,10.64")
+
+        monkeypatch.setattr(OSRMRequestHandler, "status", 200)
+        deadline = time.monotonic() + 5
+        while client.open and time.monotonic() < deadline:
+            time.sleep(0.05)
+        snappedCoords = client.nearest(10.64, -61.399)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert reportRequests == 2 and snappedCoords == (10.6401, -61.3991)
+
+#Writes an OpenStreetMap XML export with a road along latitude 10.64, and a footpath along latitude 10.6403, to the given path.
+def writeRoadExport(path):
+    path.write_text("""<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+  <node id="1" lat="10.64" lon="-61.40"/>
+  <node id="2" lat="10.64" lon="-61.395"/>
+  <node id="3" lat="10.64" lon="-61.39"/>
+  <node id="4" lat="10.6403" lon="-61.40"/>
+  <node id="5" lat="10.6403" lon="-61.39"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="residential"/><tag k="name" v="Test Street"/></way>
+  <way id="11"><nd ref="4"/><nd ref="5"/><tag k="highway" v="footway"/></way>
+</osm>""")
+
+# Integration Test 86: snapCoordsToStreet should snap coordinates to the nearest road of the configured segment file, without contacting the OSRM server.
+def testSnapCoordsToStreetLocalRoadNetwork(empty_db, monkeypatch, tmp_path):
+    writeRoadExport(tmp_path / "roads.osm")
+    segmentCount = buildRoadSegments(str(tmp_path / "roads.osm"), str(tmp_path / "roads.segments"))
+    monkeypatch.setitem(current_app.config, "ROAD_SEGMENTS_FILE", str(tmp_path / "roads.segments"))
+    monkeypatch.setattr(import_module("App.controllers.report"), "requestSnappedCoords", lambda latitude, longitude: pytest.fail("The OSRM server was contacted."))
+
+    (latitude, longitude) = snapCoordsToStreet(10.6402, -61.3925)
+    with pytest.raises(Exception):
+        snapCoordsToStreet(10.70, -61.3925)
+
+    assert segmentCount == 2 and latitude == pytest.approx(10.64) and longitude == pytest.approx(-61.3925)
+
+# Integration Test 87: resnapAllPotholes should move the potholes onto the nearest roads, and record the change to the potholes.
+def testResnapAllPotholes(empty_db, tmp_path):
+    writeRoadExport(tmp_path / "roads.osm")
+    buildRoadSegments(str(tmp_path / "roads.osm"), str(tmp_path / "roads.segments"))
+    expiryDate = datetime.now() + timedelta(days=60)
+    db.session.add_all([
+        Pothole(latitude=10.6401, longitude=-61.398, expiryDate=expiryDate),
+        Pothole(latitude=10.64, longitude=-61.391, expiryDate=expiryDate),
+        Pothole(latitude=10.70, longitude=-61.391, expiryDate=expiryDate)
+    ])
+    db.session.commit()
+    version = getDataVersion("potholes")
+
+    moved = resnapAllPotholes(RoadNetwork.load(str(tmp_path / "roads.segments")))
+    potholes = db.session.query(Pothole).order_by(Pothole.potholeID).all()
+
+    assert moved == 1 and getDataVersion("potholes") == version + 1
+    assert [(p.latitude, p.longitude) for p in potholes] == [(pytest.approx(10.64), pytest.approx(-61.398)), (10.64, -61.391), (10.70, -61.391)]
+
+#Simulates an OSRM server that responds after a delay, recording the largest number of requests that it was handling at the same time.
+class ConcurrentOSRMRequestHandler(OSRMRequestHandler):
+    lock = threading.Lock()
+    active = 0
+    maxActive = 0
+
+    def do_GET(self):
+        with self.lock:
+            ConcurrentOSRMRequestHandler.active += 1
+            ConcurrentOSRMRequestHandler.maxActive = max(ConcurrentOSRMRequestHandler.maxActive, ConcurrentOSRMRequestHandler.active)
+        try:
+            OSRMRequestHandler.do_GET(self)
+        finally:
+            with self.lock:
+                ConcurrentOSRMRequestHandler.active -= 1
+
+# Integration Test 88: nearestMany should snap a batch of coordinates in order, sending at most the configured number of requests at the same time.
+def testOSRMNearestMany(empty_db, monkeypatch):
+    monkeypatch.setattr(OSRMRequestHandler, "paths", [])
+    monkeypatch.setattr(ConcurrentOSRMRequestHandler, "delay", 0.1)
+    monkeypatch.setattr(ConcurrentOSRMRequestHandler, "maxActive", 0)
+    server = startHTTPServer(ConcurrentOSRMRequestHandler)
+    client = OSRMClient("http://127.0.0.1:" + str(server.server_port) + "/nearest/v1/driving/", 1, concurrency=4)
+    coordinates = [(10.64 + i * 0.001, -61.399) for i in range(12)]
+    try:
+        startTime = time.monotonic()
+        snappedCoords = client.nearestMany(coordinates)
+        elapsed = time.monotonic() - startTime
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert snappedCoords == [(10.6401, -61.3991)] * 12 and len(OSRMRequestHandler.paths) == 12
+    assert 1 < ConcurrentOSRMRequestHandler.maxActive <= 4 and elapsed < 1.0
+
+# Integration Test 89: reportPotholeDriverBatch should snap all of the points of the batch at once, snapping only the locations that are not cached.
+def testDriverReportBatchSnapsOnce(users_in_db, monkeypatch):
+    batches = []
+    monkeypatch.setattr(import_module("App.controllers.report"), "requestSnappedCoordsBatch", lambda coordinates: batches.append(coordinates) or [None] * len(coordinates))
+    cacheSnap(10.726551, -61.277001, (10.7266, -61.2771))
+    batchDetails = {
+        "points" : [
+            {"longitude" : -61.277001, "latitude" : 10.726551},
+            {"longitude" : -61.452443, "latitude" : 10.650744},
+            {"longitude" : -61.350000, "latitude" : 10.600000}
+        ]
+    }
+
+    rv = reportPotholeDriverBatch(getOneRegisteredUser("tester1@yahoo.com"), batchDetails)
+    coordinates = sorted((pothole["latitude"], pothole["longitude"]) for pothole in getAllPotholes())
+
+    assert rv[1] == 201 and rv[0]["reported"] == 3 and batches == [[(10.650744, -61.452443), (10.6, -61.35)]]
+    assert coordinates == [(10.6, -61.35), (10.650744, -61.452443), (10.7266, -61.2771)]
+
+# Integration Test 90: the listing endpoints should be tagged with the data version, and answer requests for an unchanged listing with 304 using a single query.
+def testListingETags(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 3)]
+    pothole = createReportedPothole(users, 10.65, -61.45)
+    potholeID = pothole.potholeID
+    client = current_app.test_client()
+
+    rvPotholes = client.get("/api/potholes")
+    rvReports = client.get("/api/reports")
+    rvPotholeReports = client.get("/api/reports/pothole/" + str(potholeID))
+    etag = rvPotholes.headers["ETag"]
+    rvNotModified = []
+    statementCount = countStatements(lambda: rvNotModified.append(client.get("/api/potholes", headers={"If-None-Match" : etag})))
+
+    db.session.add(Pothole(latitude=10.7, longitude=-61.3, expiryDate=datetime.now() + timedelta(days=60)))
+    db.session.commit()
+    rvChanged = client.get("/api/potholes", headers={"If-None-Match" : etag})
+
+    assert rvPotholes.status_code == 200 and rvReports.headers["ETag"] == etag and rvPotholeReports.headers["ETag"] == etag
+    assert rvNotModified[0].status_code == 304 and rvNotModified[0].data == b"" and statementCount == 1
+    assert rvChanged.status_code == 200 and rvChanged.headers["ETag"] != etag and len(json.loads(rvChanged.data)) == 2
+
+# Integration Test 91: the data version should be bumped by bulk updates of the vote counts and by changes to the names of users, but not by other changes to users.
+def testDataVersionBumpedByListedChanges(users_in_db):
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    pothole = createReportedPothole([user], 10.65, -61.45)
+    reportID = pothole.reports[0].reportID
+    versions = [getDataVersion("data")]
+
+    updateVoteCounts(reportID, True, 1)
+    db.session.commit()
+    versions.append(getDataVersion("data"))
+    user.confirmed = True
+    db.session.commit()
+    versions.append(getDataVersion("data"))
+    user.firstName = "Renamed"
+    db.session.commit()
+    versions.append(getDataVersion("data"))
+
+    assert versions[0] < versions[1] == versions[2] < versions[3]
+
+# Integration Test 92: /api/potholes/changes should return the potholes changed since the cursor, and the potholeIDs of the deleted potholes.
+def testPotholeChanges(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 3)]
+    keptPotholeID = createReportedPothole(users[:1], 10.65, -61.45).potholeID
+    deletedPotholeID = createReportedPothole(users, 10.70, -61.30).potholeID
+    client = current_app.test_client()
+
+    rvAll = json.loads(client.get("/api/potholes/changes?since=0").data)
+    db.session.add(Report(userID=users[1].userID, potholeID=keptPotholeID, description="Second report."))
+    db.session.commit()
+    deletePothole(deletedPotholeID)
+    rvChanged = json.loads(client.get("/api/potholes/changes?since=" + str(rvAll["cursor"])).data)
+    rvUnchanged = json.loads(client.get("/api/potholes/changes?since=" + str(rvChanged["cursor"])).data)
+    rvInvalid = client.get("/api/potholes/changes?since=latest")
+
+    assert [p["potholeID"] for p in rvAll["potholes"]] == [keptPotholeID, deletedPotholeID] and rvAll["deleted"] == []
+    assert [(p["potholeID"], p["numReports"]) for p in rvChanged["potholes"]] == [(keptPotholeID, 2)] and rvChanged["deleted"] == [deletedPotholeID]
+    assert rvUnchanged == {"potholes" : [], "deleted" : [], "cursor" : rvChanged["cursor"]} and rvInvalid.status_code == 400
+
+# Integration Test 93: /api/potholes/changes should return 410 with the current cursor for cursors whose changes have been pruned.
+def testPotholeChangesPruned(users_in_db):
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    createReportedPothole([user], 10.65, -61.45)
+    db.session.query(PotholeChange).update({"dateChanged" : datetime.utcnow() - timedelta(days=31)})
+    db.session.commit()
+    newPotholeID = createReportedPothole([user], 10.70, -61.30).potholeID
+    client = current_app.test_client()
+
+    pruned = prunePotholeChangeLog()
+    rvPruned = client.get("/api/potholes/changes?since=0")
+    rvCurrent = json.loads(client.get("/api/potholes/changes?since=" + str(json.loads(rvPruned.data)["cursor"])).data)
+    prunedCursor = getDataVersion("potholeChangesPruned")
+    rvRecent = json.loads(client.get("/api/potholes/changes?since=" + str(prunedCursor)).data)
+
+    assert pruned > 0 and rvPruned.status_code == 410 and rvCurrent["potholes"] == []
+    assert [p["potholeID"] for p in rvRecent["potholes"]] == [newPotholeID]
+
+# Integration Test 94: /api/potholes should return the potholes within the bounding box, in pages ordered by potholeID, continued from the cursor.
+def testPotholesInViewport(empty_db):
+    expiryDate = datetime.now() + timedelta(days=60)
+    db.session.add_all([Pothole(latitude=10.60 + i * 0.01, longitude=-61.40, expiryDate=expiryDate) for i in range(5)] + [Pothole(latitude=10.62, longitude=-61.00, expiryDate=expiryDate)])
+    db.session.commit()
+    client = current_app.test_client()
+
+    rvFirst = client.get("/api/potholes?bbox=-61.5,10.605,-61.3,10.65&limit=2")
+    rvSecond = client.get("/api/potholes?bbox=-61.5,10.605,-61.3,10.65&limit=2&cursor=" + rvFirst.headers["X-Next-Cursor"])
+    rvInvalid = client.get("/api/potholes?bbox=-61.3,10.605,-61.5,10.65")
+    plan = explainQueryPlan(queryPotholeSummaries().filter(Pothole.latitude.between(10.605, 10.65), Pothole.longitude.between(-61.5, -61.3)))
+
+    assert [round(p["latitude"], 2) for p in json.loads(rvFirst.data)] == [10.61, 10.62] and "ETag" in rvFirst.headers
+    assert [round(p["latitude"], 2) for p in json.loads(rvSecond.data)] == [10.63, 10.64] and "X-Next-Cursor" not in rvSecond.headers
+    assert rvInvalid.status_code == 400 and "ix_pothole_l" in plan
+
+#Returns the clusters of every zoom level, by (zoom, cellRow, cellColumn), with their counts and rounded sums of coordinates.
+def getClusterState():
+    return {(c.zoom, c.cellRow, c.cellColumn) : (c.potholeCount, c.reportCount, round(c.latitudeSum, 6), round(c.longitudeSum, 6)) for c in db.session.query(PotholeCluster).all()}
+
+# Integration Test 95: the pothole clusters should be maintained as potholes and reports are created, moved and deleted, matching clusters rebuilt from the potholes.
+def testPotholeClustersMaintained(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 4)]
+    potholes = [createReportedPothole(users[:i + 1], 10.60 + i * 0.02, -61.40 + i * 0.02) for i in range(3)]
+    deletedPotholeID = potholes[0].potholeID
+    potholes[1].latitude = 10.75
+    db.session.commit()
+    db.session.delete(potholes[2].reports[0])
+    db.session.commit()
+    deletePothole(deletedPotholeID)
+
+    maintainedClusters = getClusterState()
+    rebuiltCount = rebuildPotholeClusters()
+    zoomZeroClusters = [c for (key, c) in maintainedClusters.items() if key[0] == 0]
+
+    assert maintainedClusters == getClusterState() and rebuiltCount == len(maintainedClusters)
+    assert zoomZeroClusters == [(2, 4, round(10.75 + 10.64, 6), round(-61.38 - 61.36, 6))]
+
+# Integration Test 96: /api/potholes/clusters should return the clusters of the zoom level within the viewport, with their centroids and counts.
+def testPotholeClustersEndpoint(users_in_db):
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    for (latitude, longitude) in [(10.6501, -61.4501), (10.6502, -61.4502), (10.30, -61.10)]:
+        createReportedPothole([user], latitude, longitude)
+    client = current_app.test_client()
+
+    rvCountry = client.get("/api/potholes/clusters?zoom=0")
+    rvViewport = client.get("/api/potholes/clusters?zoom=12&bbox=-61.5,10.6,-61.4,10.7")
+    rvInvalid = client.get("/api/potholes/clusters?zoom=" + str(CLUSTER_MAX_ZOOM + 1))
+    viewportClusters = json.loads(rvViewport.data)
+
+    assert json.loads(rvCountry.data)[0]["numPotholes"] == 3 and len(json.loads(rvCountry.data)) == 1 and "ETag" in rvCountry.headers
+    assert len(viewportClusters) == 1 and viewportClusters[0]["numPotholes"] == 2 and viewportClusters[0]["numReports"] == 2
+    assert viewportClusters[0]["latitude"] == pytest.approx(10.65015) and rvInvalid.status_code == 400
+
+# Integration Test 97: the listing endpoints should return the columns of the listing in MessagePack when it is preferred, under a separate ETag.
+def testListingMsgpack(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 3)]
+    for (latitude, longitude) in [(10.65, -61.45), (10.70, -61.30)]:
+        createReportedPothole(users, latitude, longitude)
+    client = current_app.test_client()
+    msgpackHeaders = {"Accept" : "application/msgpack"}
+
+    rvJSON = client.get("/api/potholes")
+    potholeData = json.loads(rvJSON.data)
+    reportData = json.loads(client.get("/api/reports").data)
+    rvMsgpack = client.get("/api/potholes", headers=msgpackHeaders)
+    rvReports = client.get("/api/reports", headers=msgpackHeaders)
+    rvNotModified = client.get("/api/potholes", headers=dict(msgpackHeaders, **{"If-None-Match" : rvMsgpack.headers["ETag"]}))
+    rvMismatched = client.get("/api/potholes", headers={"If-None-Match" : rvMsgpack.headers["ETag"]})
+
+    assert rvMsgpack.mimetype == "application/msgpack" and rvJSON.mimetype != "application/msgpack" and "Accept" in rvMsgpack.headers["Vary"]
+    assert msgpack.unpackb(rvMsgpack.data) == {key : [p[key] for p in potholeData] for key in potholeData[0]}
+    assert msgpack.unpackb(rvReports.data)["description"] == [r["description"] for r in reportData]
+    assert rvMsgpack.headers["ETag"] != rvJSON.headers["ETag"] and rvNotModified.status_code == 304 and rvMismatched.status_code == 200
+
+# Integration Test 98: the pothole and report listings should be streamed in chunks, matching the listings returned outside of a request.
+def testListingsStreamed(users_in_db, monkeypatch):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 4)]
+    for i in range(5):
+        createReportedPothole(users[:i % 3 + 1], 10.60 + i * 0.01, -61.40)
+    monkeypatch.setattr(import_module("App.controllers.responseEncoding"), "STREAM_CHUNK_SIZE", 2)
+    client = current_app.test_client()
+
+    rvPotholes = client.get("/api/potholes")
+    potholeChunks = list(rvPotholes.response)
+    rvReports = client.get("/api/reports")
+    reportChunks = list(rvReports.response)
+
+    assert rvPotholes.is_streamed and len(potholeChunks) == 5 and b"".join(potholeChunks).decode() == getPotholeData()[0]
+    assert rvReports.is_streamed and len(reportChunks) == 7 and json.loads(b"".join(reportChunks)) == json.loads(getReportData()[0])
+
+# Integration Test 99: the report listings should be paged by (dateReported, reportID), continued from the cursor of the previous page through its index.
+def testReportListingPages(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 4)]
+    potholeID = createReportedPothole(users, 10.65, -61.45).potholeID
+    createReportedPothole(users[:2], 10.70, -61.30)
+    for (report, daysAgo) in zip(db.session.query(Report).order_by(Report.reportID).all(), [1, 3, 2, 3, 1]):
+        report.dateReported = datetime.utcnow().date() - timedelta(days=daysAgo)
+    db.session.commit()
+    client = current_app.test_client()
+
+    (pages, cursor) = ([], None)
+    while cursor != "":
+        rv = client.get("/api/reports?limit=2" + ("&cursor=" + cursor if cursor else ""))
+        pages.append([(r["dateReported"], r["reportID"]) for r in json.loads(rv.data)])
+        cursor = rv.headers.get("X-Next-Cursor", "")
+    rvPotholePage = client.get("/api/reports/pothole/" + str(potholeID) + "?limit=2")
+    potholePage = json.loads(rvPotholePage.data)
+    rvInvalid = client.get("/api/reports?limit=" + str(REPORT_PAGE_MAX_LIMIT + 1))
+    plan = explainQueryPlan(db.session.query(Report.reportID).filter(tuple_(Report.dateReported, Report.reportID) > (datetime.utcnow().date(), 0)).order_by(Report.dateReported, Report.reportID))
+
+    assert [len(page) for page in pages] == [2, 2, 1] and sum(pages, []) == sorted(sum(pages, []))
+    assert [r["reportID"] for r in potholePage] == [2, 3] and rvPotholePage.headers["X-Next-Cursor"].endswith(",3")
+    assert rvInvalid.status_code == 400 and "ix_report_dateReported_reportID" in plan
+
+# Integration Test 100: gzip compressed listings should be compressed once for each data version, and served from the response cache using a single query.
+def testCompressedListingCache(users_in_db):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 3)]
+    for (latitude, longitude) in [(10.65, -61.45), (10.70, -61.30)]:
+        createReportedPothole(users, latitude, longitude)
+    client = current_app.test_client()
+    gzipHeaders = {"Accept-Encoding" : "gzip"}
+
+    potholeData = client.get("/api/potholes").data
+    rvCompressed = client.get("/api/potholes", headers=gzipHeaders)
+    rvCached = []
+    statementCount = countStatements(lambda: rvCached.append(client.get("/api/potholes", headers=gzipHeaders)))
+    rvReports = client.get("/api/reports?limit=2", headers=gzipHeaders)
+    rvCachedReports = client.get("/api/reports?limit=2", headers=gzipHeaders)
+
+    db.session.add(Pothole(latitude=10.7, longitude=-61.3, expiryDate=datetime.now() + timedelta(days=60)))
+    db.session.commit()
+    rvChanged = client.get("/api/potholes", headers=gzipHeaders)
+
+    assert rvCompressed.headers["Content-Encoding"] == "gzip" and gzip.decompress(rvCompressed.data) == potholeData and rvCompressed.headers["ETag"].endswith('-gzip"')
+    assert statementCount == 1 and rvCached[0].data == rvCompressed.data and rvCached[0].headers["ETag"] == rvCompressed.headers["ETag"]
+    assert rvCachedReports.data == rvReports.data and rvCachedReports.headers["X-Next-Cursor"] == rvReports.headers["X-Next-Cursor"]
+    assert len(json.loads(gzip.decompress(rvChanged.data))) == 3
+
+# Integration Test 101: /api/potholes should be served from the memory-mapped snapshot once published, and republished by a single worker after a change to
+# the potholes, but not after a change to the votes.
+def testPotholeSnapshot(users_in_db, tmp_path, monkeypatch):
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 3)]
+    for (latitude, longitude) in [(10.65, -61.45), (10.70, -61.30)]:
+        createReportedPothole(users, latitude, longitude)
+    client = current_app.test_client()
+    databaseListing = client.get("/api/potholes").data
+    monkeypatch.setitem(current_app.config, "POTHOLE_SNAPSHOT_FILE", str(tmp_path / "potholes.snapshot"))
+
+    rvPublished = client.get("/api/potholes")
+    rvMapped = []
+    statementCount = countStatements(lambda: rvMapped.append(client.get("/api/potholes")))
+    getPotholeCache().version = None
+    cacheStatementCount = countStatements(syncPotholeCache)
+    db.session.add(Pothole(latitude=10.7, longitude=-61.3, expiryDate=datetime.now() + timedelta(days=60)))
+    db.session.commit()
+    with lockPotholeSnapshot(current_app.config["POTHOLE_SNAPSHOT_FILE"]):
+        rvLocked = client.get("/api/potholes")
+        lockedListing = rvLocked.data
+    rvRepublished = client.get("/api/potholes")
+    republishedInode = getPotholeSnapshot().inode
+    db.session.query(Report).update({Report.upvoteCount : Report.upvoteCount + 1}, synchronize_session=False)
+    db.session.commit()
+    rvVoted = client.get("/api/potholes")
+
+    assert rvPublished.data == databaseListing and rvMapped[0].data == databaseListing and statementCount == 2
+    assert cacheStatementCount == 2 and sorted(getPotholeCache().coordinates) == [p["potholeID"] for p in json.loads(databaseListing)]
+    assert len(json.loads(lockedListing)) == 3 and rvRepublished.data == lockedListing and getPotholeSnapshot().listingVersion == getDataVersion("potholeListing")
+    assert rvVoted.data == lockedListing and getPotholeSnapshot().inode == republishedInode
+
+# Integration Test 102: identical images should be stored once by the local image storage, and the stored image kept until no reported image refers to it.
+def testIdenticalImagesShareLocalStorage(users_in_db, monkeypatch, tmp_path):
+    monkeypatch.setitem(current_app.config, "IMAGE_STORAGE", "local")
+    monkeypatch.setitem(current_app.config, "UPLOAD_FOLDER", str(tmp_path))
+    current_app.extensions.pop("imageStorage", None)
+    users = [getOneRegisteredUser("tester" + str(i) + "@yahoo.com") for i in range(1, 3)]
+    pothole = createReportedPothole(users, 10.65, -61.45)
+    (potholeID, reportIDs) = (pothole.potholeID, [report.reportID for report in pothole.reports])
+    imageData = BytesIO()
+    Image.new("RGB", (640, 480), (90, 90, 90)).save(imageData, format="PNG")
+    base64Image = "data:image/png;base64," + base64.b64encode(imageData.getvalue()).decode()
+
+    imageSlots = queueReportImages(reportIDs[0], [base64Image, base64Image], Testing=True)
+    rvSecondReport = addPotholeReportImage(users[1], potholeID, reportIDs[1], {"images" : [base64Image]}, Testing=True)
+    storedImages = [db.session.get(ReportedImage, slot["imageID"]) for slot in imageSlots]
+    imagePath = getImageStorage().getPath(storedImages[0].imageURL[len("/api/images/"):])
+    storedFileCount = len(os.listdir(os.path.dirname(imagePath)))
+    deletePotholeReportImage(users[0], potholeID, reportIDs[0], storedImages[0].imageID)
+    keptAfterImageDeleted = os.path.exists(imagePath)
+    deleteUserPotholeReport(users[0], potholeID, reportIDs[0])
+    keptAfterReportDeleted = os.path.exists(imagePath)
+    deleteUserPotholeReport(users[1], potholeID, reportIDs[1])
+
+    assert [image.status for image in storedImages] == ["ready", "ready"] and storedImages[0].imageURL == storedImages[1].imageURL
+    assert rvSecondReport[1] == 201 and storedFileCount == 1
+    assert keptAfterImageDeleted and keptAfterReportDeleted and not os.path.exists(imagePath)
+
+# Integration Test 103: an image slot should be marked as failed if the outcome of its processing cannot be committed, rather than being left processing.
+def testReportImageFailedWhenCommitFails(users_in_db, monkeypatch):
+    user = getOneRegisteredUser("tester1@yahoo.com")
+    reportID = createReportedPothole([user], 10.65, -61.45).reports[0].reportID
+    imageSlot = ReportedImage(reportID=reportID, status="processing")
+    db.session.add(imageSlot)
+    db.session.commit()
+    imageID = imageSlot.imageID
+    commit = db.session.commit
+    failedCommits = []
+    def failFirstCommit():
+        if not failedCommits:
+            failedCommits.append(True)
+            raise Exception("Commit failed.")
+        commit()
+    monkeypatch.setattr(import_module("App.controllers.reportedImage"), "uploadImage", lambda base64Image, Testing=False: "https://example.com/uploaded.jpg")
+    monkeypatch.setattr(db.session, "commit", failFirstCommit)
+
+    processReportImage(imageID, "data:image/png;base64,", Testing=True)
+    monkeypatch.undo()
+    db.session.expire_all()
+    imageSlot = db.session.get(ReportedImage, imageID)
+
+    assert failedCommits and imageSlot.status == "failed" and imageSlot.imageURL == None
+
+#Runs the python code in a separate process from the root of the repository, with the application configured to use the given database, and returns the
+#completed process. The application is created before the code is run, as it is by manage.py.
+def runWithApplication(databaseURI, code):
+    setup = "from App.main import create_app, db\nfrom flask_migrate import Migrate, stamp, upgrade, downgrade, current\n" \
+        + "app = create_app({'SQLALCHEMY_DATABASE_URI' : '" + databaseURI + "'})\nmigrate = Migrate(app, db, render_as_batch=True)\n"
+    return subprocess.run([sys.executable, "-c", setup + code], cwd=os.path.dirname(current_app.root_path), capture_output=True, text=True, timeout=120)
+
+# Integration Test 104: creating the application should not create the tables of the database, such that 'db upgrade' brings a database at the baseline
+# schema up to date through the migrations.
+def testUpgradeBaselineDatabase(empty_db, tmp_path):
+    databaseURI = "sqlite:///" + str(tmp_path / "baseline.db")
+    baseline = runWithApplication(databaseURI, "db.create_all()\nstamp()\ndowngrade(revision='base')\n")
+    upgraded = runWithApplication(databaseURI, "upgrade()\nprint(sorted(db.engine.table_names()))\n")
+
+    assert baseline.returncode == 0 and upgraded.returncode == 0, baseline.stderr + upgraded.stderr
+    assert "'data_version'" in upgraded.stdout and "'pothole_cluster'" in upgraded.stdout
+
+# Integration Test 105: getSnapCacheStatistics should count the lookups of all of the workers, in the database, regardless of the outcome of the requests.
+def testSnapCacheStatisticsArePersisted(empty_db):
+    cacheSnap(10.1, -61.1, (10.1, -61.1))
+    getCachedSnaps([(10.1, -61.1), (10.2, -61.2), (10.3, -61.3)])
+    db.session.rollback()
+    getCachedSnap(10.1, -61.1)
+    statistics = getSnapCacheStatistics()
+
+    assert statistics["hits"] == 2 and statistics["misses"] == 2 and statistics["hitRate"] == 0.5 and statistics["entries"] == 1
+    assert db.session.query(DataVersion).get("snapCacheHits").version == 2
+
+# Integration Test 106: cacheSnap and getCachedSnap should write the snap cache in a separate transaction, neither committing nor rolling back the session of the request.
+def testSnapCacheDoesNotCommitSession(empty_db):
+    db.session.add(Pothole(latitude=10.1, longitude=-61.1, expiryDate=datetime.now() + timedelta(days=60)))
+    cacheSnap(10.1, -61.1, (10.1, -61.1))
+    cachedCoords = getCachedSnap(10.1, -61.1)
+    pendingPotholes = len(db.session.new)
+    db.session.rollback()
+
+    assert cachedCoords == (10.1, -61.1) and pendingPotholes == 1 and db.session.query(Pothole).count() == 0
+
+# Integration Test 107: cacheSnap should only evict locations from the snap cache once the locations added to it reach the eviction interval, and trimSnapCache
+# should evict the excess locations at any time.
+def testSnapCacheEvictsAtInterval(empty_db, monkeypatch):
+    snapCacheController = import_module("App.controllers.snapCache")
+    monkeypatch.setattr(snapCacheController, "SNAP_CACHE_SIZE", 1)
+    monkeypatch.setattr(snapCacheController, "SNAP_CACHE_EVICTION_INTERVAL", 3)
+
+    cacheSnap(10.1, -61.1, (10.1, -61.1))
+    cacheSnap(10.2, -61.2, (10.2, -61.2))
+    entriesBeforeInterval = db.session.query(SnapCacheEntry).count()
+    cacheSnap(10.3, -61.3, (10.3, -61.3))
+    entriesAtInterval = db.session.query(SnapCacheEntry).count()
+    cacheSnap(10.4, -61.4, (10.4, -61.4))
+    evicted = trimSnapCache()
+
+    assert entriesBeforeInterval == 2 and entriesAtInterval == 1 and evicted == 1 and db.session.query(SnapCacheEntry).count() == 1
+
+# Integration Test 108: the data versions should be created and changed by a single upsert, such that workers changing a dataset for the first time do not race.
+def testDataVersionUpsert(empty_db):
+    bumpStatementCount = countStatements(lambda: bumpDataVersionOnConnection(db.session.connection(), "firstChange"))
+    bumpDataVersionOnConnection(db.session.connection(), "firstChange", 5)
+    setDataVersion("firstSet", 7)
+    setDataVersion("firstSet", 3)
+    firstBump = bumpDataVersion("firstBump")
+    db.session.commit()
+
+    assert bumpStatementCount == 1 and firstBump == 1
+    assert getDataVersion("firstChange") == 6 and getDataVersion("firstSet") == 3 and db.session.query(DataVersion).count() == 3
+
+#Simulates an OSRM server that keeps the connections of its clients open between requests, recording the port of the client of each request.
+class KeepAliveOSRMRequestHandler(OSRMRequestHandler):
+    protocol_version = "HTTP/1.1"
+    clientPorts = []
+
+    def do_GET(self):
+        self.clientPorts.append(self.client_address[1])
+        super().do_GET()
+
+# Integration Test 109: nearestMany should reuse the threads of the OSRM client, and therefore the connections of their sessions, for every batch.
+def testOSRMNearestManyReusesConnections(empty_db, monkeypatch):
+    monkeypatch.setattr(OSRMRequestHandler, "paths", [])
+    monkeypatch.setattr(KeepAliveOSRMRequestHandler, "clientPorts", [])
+    server = startHTTPServer(KeepAliveOSRMRequestHandler)
+    client = OSRMClient("http://127.0.0.1:" + str(server.server_port) + "/nearest/v1/driving/", 1, concurrency=2)
+    coordinates = [(10.64 + i * 0.001, -61.399) for i in range(4)]
+    try:
+        snappedBatches = [client.nearestMany(coordinates) for i in range(3)]
+        executor = client.executor
+        client.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert snappedBatches == [[(10.6401, -61.3991)] * 4] * 3 and len(KeepAliveOSRMRequestHandler.clientPorts) == 12
+    assert len(set(KeepAliveOSRMRequestHandler.clientPorts)) <= 2 and executor._shutdown and client.executor == None
+
+# Integration Test 110: failStaleReportImages should mark the images that have been processing for too long as failed, leaving the images still being processed.
+def testFailStaleReportImages(users_in_db):
+    users = [getOneRegisteredUser("tester1@yahoo.com")]
+    pothole = createReportedPothole(users, 10.65, -61.45)
+    reportID = pothole.reports[0].reportID
+    staleSlot = ReportedImage(reportID=reportID, status="processing", dateQueued=datetime.utcnow() - timedelta(minutes=31))
+    queuedSlot = ReportedImage(reportID=reportID, status="processing", dateQueued=datetime.utcnow())
+    db.session.add_all([staleSlot, queuedSlot])
+    db.session.commit()
+
+    failed = failStaleReportImages()
+    sweepStaleReportImages()
+
+    assert failed == 1 and staleSlot.status == "failed" and queuedSlot.status == "processing"
+    assert [image.status for image in db.session.query(ReportedImage).filter_by(reportID=reportID).order_by(ReportedImage.imageID)] == ["ready", "failed", "processing"]
+
+# Integration Test 111: the report listings should reject malformed cursors with a 'BAD REQUEST' http status code (400), rather than reporting invalid data.
+def testReportListingInvalidCursor(users_in_db):
+    users = [getOneRegisteredUser("tester1@yahoo.com")]
+    potholeID = createReportedPothole(users, 10.65, -61.45).potholeID
+    client = current_app.test_client()
+
+    responses = [client.get("/api/reports?cursor=" + cursor) for cursor in ["abc", "2026-01-01", "2026-13-01,1", "2026-01-01,x", "2026-01-01,1,2"]]
+    rvPothole = client.get("/api/reports/pothole/" + str(potholeID) + "?cursor=abc")
+    (userError, userStatus) = getReportDataForUser(users[0], cursor="abc")
+    rvValid = client.get("/api/reports?cursor=2000-01-01,0")
+
+    assert all(rv.status_code == 400 and json.loads(rv.data) == {"error": "Invalid cursor specified."} for rv in responses + [rvPothole])
+    assert userStatus == 400 and json.loads(userError) == {"error": "Invalid cursor specified."}
+    assert rvValid.status_code == 200 and len(json.loads(rvValid.data)) == 1
@@ -27,5 +27,5 @@ def displayUserPotholes():
 @dashboardViews.route('/api/dashboard/reports', methods=["GET"])
 @jwt_required()
 def displayUserReports():
-    displayData, statusCode = getReportDataForUser(current_user)
-    return displayData, statusCode 
\ No newline at end of file
+    #Returns the page of the user's reports, along with the cursor of the next page, if there is one.
+    return getReportDataForUser(current_user, request.args.get("limit"), request.args.get("cursor"))
\ No newline at end of file
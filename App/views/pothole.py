@@ -9,7 +9,9 @@ from flask_jwt_extended import current_user, jwt_required
 from flask import Blueprint, redirect, request, jsonify, send_from_directory
 
 #Imports controllers
-from App.controllers.pothole import getIndividualPotholeData, getPotholeData, getUserPotholeData, nukePotholesInDB
+from App.controllers.pothole import getIndividualPotholeData, getPotholeData, getPotholesInViewport, getUserPotholeData, nukePotholesInDB
+from App.controllers.potholeChange import getPotholeChanges
+from App.controllers.potholeCluster import getPotholeClusters
 
 #Creates a blueprint to the collection of views for potholes.
 potholeViews = Blueprint('potholeViews', __name__)
@@ -17,12 +19,29 @@ potholeViews = Blueprint('potholeViews', __name__)
 #Imports the all of the controllers of the application.
 from App.controllers import *
 
-#Creates a GET route for the retrieval of all of the pothole data. Also returns a status code to denote the outcome of the operation.
+#Creates a GET route for the retrieval of all of the pothole data, or of the potholes within the viewport given by the 'bbox', 'limit' and 'cursor'
+#query parameters. Also returns a status code to denote the outcome of the operation.
 @potholeViews.route('/api/potholes', methods=["GET"])
 def displayPotholes():
-    displayData, statusCode = getPotholeData()
+    #Answers requests for an unchanged listing with a 'NOT MODIFIED' http status code (304).
+    if "bbox" in request.args:
+        return conditionalDataResponse(getPotholesInViewport, request.args.get("bbox"), request.args.get("limit"), request.args.get("cursor"))
+    return conditionalDataResponse(getPotholeData)
+
+#Creates a GET route for the retrieval of the potholes that changed since the cursor given by the 'since' query parameter, and the potholeIDs of the
+#potholes that were deleted. Also returns a status code to denote the outcome of the operation.
+@potholeViews.route('/api/potholes/changes', methods=["GET"])
+def displayPotholeChanges():
+    displayData, statusCode = getPotholeChanges(request.args.get("since"))
     return displayData, statusCode
 
+#Creates a GET route for the retrieval of the clusters of potholes for the zoom level given by the 'zoom' query parameter, optionally within the viewport
+#given by the 'bbox' query parameter. Also returns a status code to denote the outcome of the operation.
+@potholeViews.route('/api/potholes/clusters', methods=["GET"])
+def displayPotholeClusters():
+    #Answers requests for unchanged clusters with a 'NOT MODIFIED' http status code (304).
+    return conditionalDataResponse(getPotholeClusters, request.args.get("zoom"), request.args.get("bbox"))
+
 #Creates a GET route for the retrieval of a single pothole's data. Also returns a status code to denote the outcome of the operation.
 @potholeViews.route('/api/potholes/<id>', methods=["GET"])
 def displayIndividualPotholes(id):
@@ -20,14 +20,14 @@ from App.controllers import *
 #Creates a GET route for the retrieval of all of the report data. Also returns a status code to denote the outcome of the operation.
 @reportViews.route('/api/reports', methods=["GET"])
 def displayReports():
-    displayData, statusCode = getReportData()
-    return displayData, statusCode
+    #Answers requests for an unchanged listing with a 'NOT MODIFIED' http status code (304).
+    return conditionalDataResponse(getReportData, request.args.get("limit"), request.args.get("cursor"))
 
 #Creates a GET route for the retrieval of all of the report data for a particular pothole. Also returns a status code to denote the outcome of the operation.
 @reportViews.route('/api/reports/pothole/<potholeID>', methods=["GET"])
 def displayPotholeReports(potholeID):
-    displayData, statusCode = getPotholeReports(potholeID)
-    return displayData, statusCode
+    #Answers requests for an unchanged listing with a 'NOT MODIFIED' http status code (304).
+    return conditionalDataResponse(getPotholeReports, potholeID, request.args.get("limit"), request.args.get("cursor"))
 
 #Creates a GET route for the retrieval of an individual report of a pothole. Also returns a status code to denote the outcome of the operation.
 @reportViews.route('/api/reports/pothole/<potholeID>/report/<reportID>', methods=["GET"])
@@ -68,4 +68,13 @@ def standardReport():
 def driverReport():
     reportDetails = request.get_json()
     outcomeMessage, statusCode = reportPotholeDriver(current_user, reportDetails)
+    return json.dumps(outcomeMessage), statusCode
+
+#Creates a POST route for the creating of a batch of reports of potholes via the driver interface. Also returns a status code to denote the outcome of the operation.
+@reportViews.route('/api/reports/driver/batch', methods=["POST"])
+#Ensures that this route is only accessible to logged in users.
+@jwt_required()
+def driverReportBatch():
+    batchDetails = request.get_json()
+    outcomeMessage, statusCode = reportPotholeDriverBatch(current_user, batchDetails)
     return json.dumps(outcomeMessage), statusCode
\ No newline at end of file
@@ -42,4 +42,18 @@ def deletePotholeImage(potholeID, reportID, imageID):
 def addPotholeImage(potholeID, reportID):
     imageDetails = request.get_json()
     displayData, statusCode = addPotholeReportImage(current_user, potholeID, reportID, imageDetails)
-    return displayData, statusCode
\ No newline at end of file
+    return displayData, statusCode
+
+#Creates a GET route for the retrieval of an image stored in the local image storage. The images are named by their content, and are therefore
+#never modified, such that they can be cached by clients indefinitely. The image file is sent by the server without being read by the application.
+@reportedImageViews.route(LOCAL_IMAGE_ROUTE + '/<path:filePath>', methods=["GET"])
+def getStoredImage(filePath):
+    storage = getImageStorage()
+    #If the images are not stored locally, there are no images to serve.
+    if not isinstance(storage, LocalImageStorage):
+        return {"error" : "Image not found!"}, 404
+
+    #Sends the image, responding to conditional requests, and marks the image as immutable.
+    response = send_from_directory(storage.folder, filePath, mimetype="image/jpeg", conditional=True, cache_timeout=LOCAL_IMAGE_CACHE_TIMEOUT)
+    response.headers["Cache-Control"] = "public, max-age=" + str(LOCAL_IMAGE_CACHE_TIMEOUT) + ", immutable"
+    return response
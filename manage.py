@@ -5,32 +5,38 @@
 #Import Modules
 from collections import UserString
 from flask_script import Manager
-from flask_migrate import Migrate, MigrateCommand
+from flask_migrate import Migrate, MigrateCommand, stamp
 
 #Import models and controllers
 from App.models import *
 from App.controllers import *
-from App.controllers.pothole import deleteExpiredPotholes, nukePotholesInDB
+from App.controllers.pothole import deleteExpiredPotholes, nukePotholesInDB, resnapAllPotholes
+from App.controllers.potholeChange import prunePotholeChangeLog
+from App.controllers.potholeCluster import rebuildPotholeClusters
 
 #Imports the main application object 
 from App.main import *
 
-#Creates app and initializes database
+#Creates the app. The database is not created here, such that the schema of existing databases is only changed by the migrations,
+#via the 'python3 manage.py db upgrade' command; new databases are created via the 'python3 manage.py initDB' command.
 app = create_app()
-init_db(app)
 
 #Initializes the manager for the application and the database migrator.
+#Migrations are rendered in batch mode, such that changes to existing tables can be applied to SQLite databases, which cannot alter columns.
 manager = Manager(app)
-migrate = Migrate(app, db)
+migrate = Migrate(app, db, render_as_batch=True)
 
 #Sets the migration command for migrating the database.
 manager.add_command('db', MigrateCommand)
 
 #Initializes the database via the 'python3 manage.py initDB' command.
 #Creates the database for the application and prints a message once the initialization is complete.
+#The new database is stamped with the latest migration, since it already has the latest schema. Existing databases are instead
+#brought up to date via the 'python3 manage.py db upgrade' command.
 @manager.command
 def initDB():
     db.create_all(app=app)
+    stamp()
     print('Database Initialized!')
 
 #Defines code that should be run at startup of the server.
@@ -59,6 +65,59 @@ def removeReport(reportID):
         db.session.rollback()
         print("Unable to delete report!")
 
+#Rebuilds the upvote and downvote counts of all of the reports from their votes, via the 'python3 manage.py recountVotes' command.
+@manager.command
+def recountVotes():
+    updated = recountReportVotes()
+    print("Recounted the votes of " + str(updated) + " reports!")
+
+#Deletes the changes to the potholes that are older than the retention period, via the 'python3 manage.py prunePotholeChanges' command.
+@manager.command
+def prunePotholeChanges():
+    pruned = prunePotholeChangeLog()
+    print("Pruned " + str(pruned) + " pothole changes!")
+
+#Rebuilds the clusters of potholes for every zoom level of the map from all of the potholes, via the 'python3 manage.py rebuildClusters' command.
+@manager.command
+def rebuildClusters():
+    clusterCount = rebuildPotholeClusters()
+    print("Rebuilt " + str(clusterCount) + " pothole clusters!")
+
+#Prints the hits, misses and hit rate of the snap cache, counted across all of the workers, and the number of locations that it holds,
+#via the 'python3 manage.py snapCacheStatistics' command.
+@manager.command
+def snapCacheStatistics():
+    statistics = getSnapCacheStatistics()
+    print("Snap cache: " + str(statistics["hits"]) + " hits, " + str(statistics["misses"]) + " misses (" + str(round(statistics["hitRate"] * 100, 1)) + "% hit rate), " + str(statistics["entries"]) + " locations cached.")
+
+#Evicts the least recently used locations from the snap cache until it holds at most its configured number of locations,
+#via the 'python3 manage.py pruneSnapCache' command.
+@manager.command
+def pruneSnapCache():
+    evicted = trimSnapCache()
+    print("Evicted " + str(evicted) + " locations from the snap cache!")
+
+#Marks the images of reports that have been processing for too long, such as when their worker was restarted, as failed,
+#via the 'python3 manage.py failStaleImages' command.
+@manager.command
+def failStaleImages():
+    failed = failStaleReportImages()
+    print("Marked " + str(failed) + " images as failed!")
+
+#Extracts the roads of an OpenStreetMap XML export into a segment file, used to snap reports to roads without the OSRM server,
+#via the 'python3 manage.py buildRoadNetwork <osmFile> <segmentsFile>' command.
+@manager.command
+def buildRoadNetwork(osmFile, segmentsFile):
+    segmentCount = buildRoadSegments(osmFile, segmentsFile)
+    print("Extracted " + str(segmentCount) + " road segments!")
+
+#Snaps all of the potholes to the nearest roads, via the 'python3 manage.py resnapPotholes' command. The potholes are snapped using the OSRM server, in
+#concurrent batches, unless a segment file is given via the 'python3 manage.py resnapPotholes --segmentsFile <segmentsFile>' command.
+@manager.command
+def resnapPotholes(segmentsFile=None):
+    moved = resnapAllPotholes(RoadNetwork.load(segmentsFile) if segmentsFile else getOSRMClient())
+    print("Snapped " + str(moved) + " potholes to the road network!")
+
 #Allows the flask application to be served via the 'python3 manage.py serve' command.
 #Prints the mode in which the application is running, and also serves the application.
 @manager.command
@@ -0,0 +1,31 @@
+"""Allow reported images to share a stored image
+
+Revision ID: bcd1e837d89e
+Revises: 48b96369c8f6
+Create Date: 2026-10-18 15:29:34.056719
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bcd1e837d89e'
+down_revision = '48b96369c8f6'
+branch_labels = None
+depends_on = None
+
+# Names the unique constraint on the URL of the reported images, which is unnamed in SQLite databases, such that it can be dropped and recreated.
+NAMING_CONVENTION = {"uq" : "%(table_name)s_%(column_0_name)s_key"}
+
+
+def upgrade():
+    # Removes the unique constraint on the URL, as identical images stored by their content share the same URL.
+    with op.batch_alter_table('reported_image', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint('reported_image_imageURL_key', type_='unique')
+
+
+def downgrade():
+    # Restores the unique constraint on the URL, which requires that no stored image is shared by multiple reported images.
+    with op.batch_alter_table('reported_image', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.create_unique_constraint('reported_image_imageURL_key', ['imageURL'])